@@ -937,6 +937,9 @@ def create_tables():
             except Exception as conn_error:
                 logger.warning(f"Database connection test failed: {conn_error}")
 
+            # Preload active jobs so the first polls after a restart hit Redis
+            job_storage.warm_cache()
+
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.info("Application will continue without database features")
@@ -6,13 +6,26 @@ Provides high-performance job tracking with fallback to database.
 import json
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional, List
 import redis
+from flask import current_app, has_app_context
+from sqlalchemy.orm import selectinload
 from models import db, Job, Slide, JobMetrics
 
 logger = logging.getLogger(__name__)
 
+# Field types used when decoding cached job hashes
+_JSON_KEYS = frozenset({'job_metadata', 'slide_metadata', 'keywords', 'concepts'})
+_NUM_KEYS = frozenset({'progress', 'slides_count'})
+_BOOL_KEYS = frozenset({
+    'adaptive_sampling', 'extract_content', 'organize_slides', 'generate_pdf',
+    'enable_transcription', 'enable_ocr_enhancement', 'enable_concept_extraction',
+    'enable_slide_descriptions'
+})
+
 class JobStorageService:
     """
     Hybrid job storage service using Redis for fast access and PostgreSQL for persistence.
@@ -37,7 +50,8 @@ class JobStorageService:
         if self.enable_redis:
             try:
                 redis_url = redis_url or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
-                self.redis_client = redis.from_url(redis_url, decode_responses=True, socket_timeout=5)
+                self.redis_client = redis.from_url(redis_url, socket_timeout=5)
+                # Responses stay as bytes; callers decode only the fields they need
                 # Test connection with timeout
                 self.redis_client.ping()
                 logger.info(f"Connected to Redis at {redis_url}")
@@ -52,11 +66,32 @@ class JobStorageService:
         self.JOB_PREFIX = "job:"
         self.JOB_STATUS_PREFIX = "job_status:"
         self.JOB_PROGRESS_PREFIX = "job_progress:"
+        self.JOB_FULL_PREFIX = "job_full:"
         self.JOB_LIST_KEY = "active_jobs"
         
+        # Channel used for job status notifications (Postgres NOTIFY and Redis pub/sub)
+        self.JOB_UPDATES_CHANNEL = "job_updates"
+        
         # Cache TTL (Time To Live) in seconds
         self.CACHE_TTL = 3600  # 1 hour
         self.ACTIVE_JOB_TTL = 86400  # 24 hours
+        
+        # Number of jobs removed per pipelined round-trip during cleanup
+        self.CLEANUP_BATCH_SIZE = 1000
+        
+        # Statuses of jobs that are still in flight
+        self.ACTIVE_STATUSES = ['pending', 'processing', 'downloading', 'extracting', 'analyzing']
+        
+        # Coalesced progress updates: latest (status, progress, message) per job
+        self.PROGRESS_FLUSH_INTERVAL = 0.25  # seconds
+        self._pending_updates: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # Writes out the tail of a burst that no later call would flush
+        self._flush_timer: Optional[threading.Timer] = None
+        
+        # Statuses a coalesced progress update must never overwrite
+        self.TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
     
     def create_job(self, job_data: Dict[str, Any]) -> str:
         """
@@ -100,12 +135,14 @@ class JobStorageService:
             if self.redis_client:
                 try:
                     job_key = f"{self.JOB_PREFIX}{job_data['job_id']}"
-                    self.redis_client.hset(job_key, mapping=job_data)
-                    self.redis_client.expire(job_key, self.CACHE_TTL)
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.hset(job_key, mapping=self._serialize_job_data(job_data))
+                    pipe.expire(job_key, self.CACHE_TTL)
 
                     # Add to active jobs list
-                    self.redis_client.sadd(self.JOB_LIST_KEY, job_data['job_id'])
-                    self.redis_client.expire(self.JOB_LIST_KEY, self.ACTIVE_JOB_TTL)
+                    pipe.sadd(self.JOB_LIST_KEY, job_data['job_id'])
+                    pipe.expire(self.JOB_LIST_KEY, self.ACTIVE_JOB_TTL)
+                    pipe.execute()
                     logger.info(f"Cached job {job_data['job_id']} in Redis")
                 except Exception as redis_error:
                     logger.warning(f"Failed to cache job in Redis: {redis_error}")
@@ -150,8 +187,10 @@ class JobStorageService:
                 if self.redis_client:
                     job_key = f"{self.JOB_PREFIX}{job_id}"
                     serialized_data = self._serialize_job_data(job_data)
-                    self.redis_client.hset(job_key, mapping=serialized_data)
-                    self.redis_client.expire(job_key, self.CACHE_TTL)
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.hset(job_key, mapping=serialized_data)
+                    pipe.expire(job_key, self.CACHE_TTL)
+                    pipe.execute()
                 
                 return job_data
             
@@ -161,6 +200,48 @@ class JobStorageService:
             logger.error(f"Error getting job {job_id}: {e}")
             return None
     
+    def get_job_full(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get job data together with its slides and metrics.
+        
+        Slides and metrics are eager-loaded alongside the job instead of
+        being queried one by one. Bundles for finished jobs are cached in
+        Redis since they no longer change.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            Job data dictionary with 'slides' and 'metrics' lists, or None if not found
+        """
+        try:
+            full_key = f"{self.JOB_FULL_PREFIX}{job_id}"
+            if self.redis_client:
+                cached_bundle = self.redis_client.get(full_key)
+                if cached_bundle:
+                    return json.loads(cached_bundle)
+            
+            job = db.session.execute(
+                db.select(Job)
+                .options(selectinload(Job.slides), selectinload(Job.metrics))
+                .where(Job.job_id == job_id)
+            ).scalar_one_or_none()
+            if not job:
+                return None
+            
+            job_data = job.to_dict()
+            job_data['slides'] = [slide.to_dict() for slide in job.slides]
+            job_data['metrics'] = [metrics.to_dict() for metrics in job.metrics]
+            
+            if self.redis_client and job.status in ('completed', 'failed'):
+                self.redis_client.set(full_key, json.dumps(job_data), ex=self.CACHE_TTL)
+            
+            return job_data
+            
+        except Exception as e:
+            logger.error(f"Error getting full job {job_id}: {e}")
+            return None
+    
     def update_job_status(self, job_id: str, status: str, progress: float = None, 
                          message: str = None, error: str = None) -> bool:
         """
@@ -176,14 +257,35 @@ class JobStorageService:
         Returns:
             True if successful, False otherwise
         """
+        # A direct update supersedes the coalesced one still waiting to be flushed, but
+        # carries over its progress and message unless this call sets its own
+        with self._pending_lock:
+            queued = self._pending_updates.pop(job_id, None)
+        if queued is not None:
+            _, queued_progress, queued_message = queued
+            if progress is None:
+                progress = queued_progress
+            if message is None:
+                message = queued_message
+        
         try:
-            # Update database
-            job = Job.query.filter_by(job_id=job_id).first()
+            # Update database; lock the row so concurrent workers cannot overwrite each other
+            job = Job.query.filter_by(job_id=job_id).with_for_update().first()
             if not job:
                 logger.warning(f"Job {job_id} not found in database")
                 return False
             
-            job.update_status(status, progress, message, error)
+            # Only write when the status changed or progress moved by at least 1%
+            changed = job.update_status(status, progress, message, error)
+            
+            # Push the change to listeners instead of making them poll
+            payload = json.dumps({'job_id': job_id, 'status': status,
+                                  'progress': progress if progress is not None else job.progress})
+            if changed and db.engine.dialect.name == 'postgresql':
+                # NOTIFY is delivered when the surrounding transaction commits
+                db.session.execute(db.text("SELECT pg_notify(:channel, :payload)"),
+                                   {'channel': self.JOB_UPDATES_CHANNEL, 'payload': payload})
+            # Unchanged rows emit no UPDATE; the commit just releases the row lock
             db.session.commit()
             
             # Update Redis cache
@@ -198,15 +300,19 @@ class JobStorageService:
                 if error is not None:
                     updates['error'] = error
                 
-                self.redis_client.hset(job_key, mapping=updates)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.hset(job_key, mapping=updates)
                 
                 # Update quick status cache
                 status_key = f"{self.JOB_STATUS_PREFIX}{job_id}"
-                self.redis_client.set(status_key, status, ex=self.CACHE_TTL)
+                pipe.set(status_key, status, ex=self.CACHE_TTL)
                 
                 if progress is not None:
                     progress_key = f"{self.JOB_PROGRESS_PREFIX}{job_id}"
-                    self.redis_client.set(progress_key, progress, ex=self.CACHE_TTL)
+                    pipe.set(progress_key, progress, ex=self.CACHE_TTL)
+                
+                pipe.publish(self.JOB_UPDATES_CHANNEL, payload)
+                pipe.execute()
             
             logger.info(f"Updated job {job_id} status to {status}")
             return True
@@ -216,6 +322,112 @@ class JobStorageService:
             db.session.rollback()
             return False
     
+    def queue_progress_update(self, job_id: str, status: str, progress: float = None,
+                              message: str = None) -> None:
+        """
+        Record a high-frequency progress update to be written in a batch.
+        
+        Only the latest update per job is kept. Pending updates are flushed
+        by the first call made after PROGRESS_FLUSH_INTERVAL has elapsed, or
+        by a timer at the end of the interval if no call comes; terminal
+        statuses should go through update_job_status directly.
+        
+        Args:
+            job_id: Job identifier
+            status: Current status
+            progress: Progress percentage (0-100)
+            message: Status message
+        """
+        with self._pending_lock:
+            self._pending_updates[job_id] = (status, progress, message)
+            wait = self.PROGRESS_FLUSH_INTERVAL - (time.monotonic() - self._last_flush)
+            if wait > 0 and self._flush_timer is None:
+                app = current_app._get_current_object() if has_app_context() else None
+                self._flush_timer = threading.Timer(wait, self._trailing_flush, args=(app,))
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        
+        if wait <= 0:
+            self.flush_progress_updates()
+    
+    def _trailing_flush(self, app) -> None:
+        """Timer callback flushing pending updates inside the queuing thread's app context."""
+        with self._pending_lock:
+            self._flush_timer = None
+        if app is None:
+            self.flush_progress_updates()
+            return
+        with app.app_context():
+            self.flush_progress_updates()
+    
+    def flush_progress_updates(self) -> int:
+        """
+        Write all pending progress updates with one Redis pipeline and one
+        batched database UPDATE.
+        
+        Jobs that reached a terminal status meanwhile are left alone, so a
+        flush racing update_job_status cannot reopen a finished job.
+        
+        Returns:
+            Number of jobs updated
+        """
+        with self._pending_lock:
+            pending = self._pending_updates
+            self._pending_updates = {}
+            self._last_flush = time.monotonic()
+        
+        if not pending:
+            return 0
+        
+        rows = [
+            {'job_id': job_id, 'status': status, 'progress': progress, 'message': message}
+            for job_id, (status, progress, message) in pending.items()
+        ]
+        
+        finished = set()
+        try:
+            db.session.execute(
+                db.text("UPDATE jobs SET status = :status, "
+                        "progress = COALESCE(:progress, progress), "
+                        "message = COALESCE(:message, message) "
+                        "WHERE job_id = :job_id "
+                        "AND status NOT IN ('completed', 'failed', 'cancelled')"),
+                rows
+            )
+            db.session.commit()
+            if self.redis_client:
+                finished.update(db.session.execute(
+                    db.select(Job.job_id).where(
+                        Job.job_id.in_(list(pending)), Job.status.in_(self.TERMINAL_STATUSES)
+                    )
+                ).scalars())
+        except Exception as e:
+            logger.error(f"Error flushing progress updates: {e}")
+            db.session.rollback()
+        
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for row in rows:
+                    job_id = row['job_id']
+                    if job_id in finished:
+                        continue
+                    updates = {'status': row['status']}
+                    if row['progress'] is not None:
+                        updates['progress'] = str(row['progress'])
+                        pipe.set(f"{self.JOB_PROGRESS_PREFIX}{job_id}", row['progress'], ex=self.CACHE_TTL)
+                    if row['message'] is not None:
+                        updates['message'] = row['message']
+                    
+                    pipe.hset(f"{self.JOB_PREFIX}{job_id}", mapping=updates)
+                    pipe.set(f"{self.JOB_STATUS_PREFIX}{job_id}", row['status'], ex=self.CACHE_TTL)
+                    pipe.publish(self.JOB_UPDATES_CHANNEL, json.dumps(row))
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Error flushing progress updates to Redis: {e}")
+        
+        return len(rows)
+    
     def update_job_results(self, job_id: str, slides_count: int = None, 
                           pdf_path: str = None, study_guide_path: str = None) -> bool:
         """
@@ -231,8 +443,8 @@ class JobStorageService:
             True if successful, False otherwise
         """
         try:
-            # Update database
-            job = Job.query.filter_by(job_id=job_id).first()
+            # Update database; lock the row so concurrent workers cannot overwrite each other
+            job = Job.query.filter_by(job_id=job_id).with_for_update().first()
             if not job:
                 return False
             
@@ -279,17 +491,75 @@ class JobStorageService:
             if self.redis_client:
                 active_jobs = self.redis_client.smembers(self.JOB_LIST_KEY)
                 if active_jobs:
-                    return list(active_jobs)
+                    return [job_id.decode() for job_id in active_jobs]
             
             # Fallback to database
-            active_statuses = ['pending', 'processing', 'downloading', 'extracting', 'analyzing']
-            jobs = Job.query.filter(Job.status.in_(active_statuses)).all()
+            jobs = Job.query.filter(Job.status.in_(self.ACTIVE_STATUSES)).all()
             return [job.job_id for job in jobs]
             
         except Exception as e:
             logger.error(f"Error getting active jobs: {e}")
             return []
     
+    def subscribe_job_updates(self):
+        """
+        Subscribe to job status notifications published by update_job_status.
+        
+        Returns:
+            A Redis PubSub object subscribed to the job updates channel,
+            or None if Redis is not available. Messages carry a JSON payload
+            with job_id, status and progress as raw bytes.
+        """
+        if not self.redis_client:
+            return None
+        
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.JOB_UPDATES_CHANNEL)
+            return pubsub
+        except Exception as e:
+            logger.error(f"Error subscribing to job updates: {e}")
+            return None
+    
+    def warm_cache(self, limit: int = 500) -> int:
+        """
+        Preload the most recent active jobs from the database into Redis.
+        
+        Called once after startup so the first status polls after a restart
+        are served from the cache instead of each hitting the database.
+        
+        Args:
+            limit: Maximum number of active jobs to preload
+            
+        Returns:
+            Number of jobs cached
+        """
+        if not self.redis_client:
+            return 0
+        
+        try:
+            jobs = Job.query.filter(
+                Job.status.in_(self.ACTIVE_STATUSES)
+            ).order_by(Job.created_at.desc()).limit(limit).all()
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for job in jobs:
+                job_key = f"{self.JOB_PREFIX}{job.job_id}"
+                pipe.hset(job_key, mapping=self._serialize_job_data(job.to_dict()))
+                pipe.expire(job_key, self.CACHE_TTL)
+                pipe.sadd(self.JOB_LIST_KEY, job.job_id)
+            
+            if jobs:
+                pipe.expire(self.JOB_LIST_KEY, self.ACTIVE_JOB_TTL)
+                pipe.execute()
+            
+            logger.info(f"Warmed Redis cache with {len(jobs)} active jobs")
+            return len(jobs)
+            
+        except Exception as e:
+            logger.error(f"Error warming job cache: {e}")
+            return 0
+    
     def cleanup_completed_jobs(self, max_age_hours: int = 24) -> int:
         """
         Clean up old completed jobs from Redis cache.
@@ -312,16 +582,24 @@ class JobStorageService:
                 Job.completed_at < cutoff_time
             ).all()
             
+            # Pipeline the removals and use UNLINK so Redis frees memory off the main thread
+            pipe = self.redis_client.pipeline(transaction=False)
             cleaned_count = 0
             for job in completed_jobs:
                 job_key = f"{self.JOB_PREFIX}{job.job_id}"
                 status_key = f"{self.JOB_STATUS_PREFIX}{job.job_id}"
                 progress_key = f"{self.JOB_PROGRESS_PREFIX}{job.job_id}"
+                full_key = f"{self.JOB_FULL_PREFIX}{job.job_id}"
                 
                 # Remove from Redis
-                self.redis_client.delete(job_key, status_key, progress_key)
-                self.redis_client.srem(self.JOB_LIST_KEY, job.job_id)
+                pipe.unlink(job_key, status_key, progress_key, full_key)
+                pipe.srem(self.JOB_LIST_KEY, job.job_id)
                 cleaned_count += 1
+                
+                if cleaned_count % self.CLEANUP_BATCH_SIZE == 0:
+                    pipe.execute()
+            
+            pipe.execute()
             
             logger.info(f"Cleaned up {cleaned_count} old jobs from Redis")
             return cleaned_count
@@ -342,26 +620,26 @@ class JobStorageService:
                 serialized[key] = str(value)
         return serialized
     
-    def _deserialize_job_data(self, cached_data: Dict[str, str]) -> Dict[str, Any]:
-        """Convert Redis string data back to appropriate types."""
+    def _deserialize_job_data(self, cached_data: Dict[bytes, bytes]) -> Dict[str, Any]:
+        """Convert raw Redis hash data back to appropriate types."""
         deserialized = {}
-        for key, value in cached_data.items():
-            if key in ['job_metadata', 'slide_metadata', 'keywords', 'concepts'] and value:
+        for raw_key, value in cached_data.items():
+            key = raw_key.decode()
+            if key in _JSON_KEYS and value:
+                # json.loads accepts bytes directly, skipping an intermediate str
                 try:
                     deserialized[key] = json.loads(value)
                 except json.JSONDecodeError:
-                    deserialized[key] = value
-            elif key in ['progress', 'slides_count']:
+                    deserialized[key] = value.decode()
+            elif key in _NUM_KEYS:
                 try:
-                    deserialized[key] = float(value) if '.' in value else int(value)
+                    deserialized[key] = float(value) if b'.' in value else int(value)
                 except ValueError:
-                    deserialized[key] = value
-            elif key in ['adaptive_sampling', 'extract_content', 'organize_slides', 
-                        'generate_pdf', 'enable_transcription', 'enable_ocr_enhancement',
-                        'enable_concept_extraction', 'enable_slide_descriptions']:
-                deserialized[key] = value.lower() in ('true', '1', 'yes')
+                    deserialized[key] = value.decode()
+            elif key in _BOOL_KEYS:
+                deserialized[key] = value.lower() in (b'true', b'1', b'yes')
             else:
-                deserialized[key] = value
+                deserialized[key] = value.decode()
         return deserialized
 
 # Global instance
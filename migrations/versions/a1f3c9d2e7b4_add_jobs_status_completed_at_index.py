@@ -0,0 +1,27 @@
+"""Add composite index on jobs (status, completed_at)
+
+Revision ID: a1f3c9d2e7b4
+Revises: 
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c9d2e7b4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# The index is also declared in Job.__table_args__, so databases built by
+# db.create_all() already have it
+def upgrade():
+    op.create_index('ix_jobs_status_completed_at', 'jobs', ['status', 'completed_at'], unique=False,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_completed_at', table_name='jobs', if_exists=True)
@@ -0,0 +1,33 @@
+"""Add partial index on jobs.created_at for active jobs
+
+Revision ID: b7e2d4f81c3a
+Revises: a1f3c9d2e7b4
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d4f81c3a'
+down_revision = 'a1f3c9d2e7b4'
+branch_labels = None
+depends_on = None
+
+ACTIVE_JOB_STATUS_SQL = "status IN ('pending', 'processing', 'downloading', 'extracting', 'analyzing')"
+
+
+# The index is also declared in Job.__table_args__, so databases built by
+# db.create_all() already have it
+def upgrade():
+    op.create_index(
+        'ix_jobs_active_created_at', 'jobs', ['created_at'], unique=False,
+        postgresql_where=sa.text(ACTIVE_JOB_STATUS_SQL),
+        sqlite_where=sa.text(ACTIVE_JOB_STATUS_SQL),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_jobs_active_created_at', table_name='jobs', if_exists=True)
@@ -4,9 +4,10 @@ Provides persistent storage for jobs, slides, and metadata.
 """
 
 from datetime import datetime, timezone
+from operator import attrgetter
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import JSON, Text, Integer, String, DateTime, Boolean, Float
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from typing import Optional, Dict, Any, List
 import json
 
@@ -15,10 +16,43 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class=Base)
 
+# Attribute getters used by to_dict; attrgetter fetches all fields in one C-level call
+_JOB_GETTER = attrgetter(
+    'job_id', 'status', 'progress', 'message', 'error', 'slides_count',
+    'pdf_path', 'study_guide_path', 'enable_transcription', 'enable_concept_extraction',
+    'enable_slide_descriptions', 'created_at', 'completed_at', 'processing_time', 'video_url'
+)
+_SLIDE_GETTER = attrgetter(
+    'filename', 'slide_number', 'image_path', 'thumbnail_path', 'timestamp', 'duration',
+    'title', 'content', 'slide_type', 'keywords', 'concepts', 'transcription',
+    'description', 'ocr_confidence', 'similarity_score', 'slide_metadata'
+)
+_METRICS_KEYS = (
+    'job_id', 'download_time', 'extraction_time', 'analysis_time', 'total_processing_time',
+    'peak_memory_usage', 'cpu_usage', 'video_duration', 'video_size', 'frames_processed',
+    'slides_extracted', 'duplicates_removed', 'average_ocr_confidence', 'errors_count',
+    'warnings_count'
+)
+_METRICS_GETTER = attrgetter(*_METRICS_KEYS)
+
+# SQL predicate matching jobs that are still in flight
+ACTIVE_JOB_STATUS_SQL = "status IN ('pending', 'processing', 'downloading', 'extracting', 'analyzing')"
+
 class Job(db.Model):
     """Model for extraction jobs with full lifecycle tracking."""
     
     __tablename__ = 'jobs'
+    __table_args__ = (
+        # Lets cleanup_completed_jobs range-scan completed_at within a status
+        db.Index('ix_jobs_status_completed_at', 'status', 'completed_at'),
+        # Partial index covering only in-flight jobs, so active-job lookups stay
+        # proportional to the work in progress rather than the whole job history
+        db.Index(
+            'ix_jobs_active_created_at', 'created_at',
+            postgresql_where=db.text(ACTIVE_JOB_STATUS_SQL),
+            sqlite_where=db.text(ACTIVE_JOB_STATUS_SQL)
+        ),
+    )
     
     # Primary key
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -63,28 +97,46 @@ class Job(db.Model):
     processing_time: Mapped[Optional[float]] = mapped_column(Float)  # seconds
     file_size: Mapped[Optional[int]] = mapped_column(Integer)  # bytes
     
+    # Related rows; lazy='raise' forces callers to eager-load them explicitly
+    slides: Mapped[List['Slide']] = relationship('Slide', lazy='raise', order_by='Slide.slide_number')
+    metrics: Mapped[List['JobMetrics']] = relationship('JobMetrics', lazy='raise')
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert job to dictionary for API responses."""
+        (job_id, status, progress, message, error, slides_count, pdf_path, study_guide_path,
+         enable_transcription, enable_concept_extraction, enable_slide_descriptions,
+         created_at, completed_at, processing_time, video_url) = _JOB_GETTER(self)
         return {
-            'id': self.job_id,
-            'status': self.status,
-            'progress': self.progress,
-            'message': self.message,
-            'error': self.error,
-            'slides_count': self.slides_count,
-            'has_pdf': bool(self.pdf_path),
-            'has_study_guide': bool(self.study_guide_path),
-            'has_transcription': self.enable_transcription,
-            'has_concepts': self.enable_concept_extraction,
-            'has_descriptions': self.enable_slide_descriptions,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'processing_time': self.processing_time,
-            'video_url': self.video_url
+            'id': job_id,
+            'status': status,
+            'progress': progress,
+            'message': message,
+            'error': error,
+            'slides_count': slides_count,
+            'has_pdf': bool(pdf_path),
+            'has_study_guide': bool(study_guide_path),
+            'has_transcription': enable_transcription,
+            'has_concepts': enable_concept_extraction,
+            'has_descriptions': enable_slide_descriptions,
+            'created_at': created_at.isoformat() if created_at else None,
+            'completed_at': completed_at.isoformat() if completed_at else None,
+            'processing_time': processing_time,
+            'video_url': video_url
         }
     
-    def update_status(self, status: str, progress: float = None, message: str = None, error: str = None):
-        """Update job status with optional progress and message."""
+    def update_status(self, status: str, progress: float = None, message: str = None, error: str = None) -> bool:
+        """
+        Update job status with optional progress and message.
+        
+        Returns False without touching the row when the update is only a
+        sub-1% progress tick within the same status, so callers can skip
+        the commit.
+        """
+        if (status == self.status and error is None
+                and (message is None or message == self.message)
+                and (progress is None or abs(progress - (self.progress or 0.0)) < 1.0)):
+            return False
+        
         self.status = status
         if progress is not None:
             self.progress = progress
@@ -100,6 +152,8 @@ class Job(db.Model):
             self.completed_at = datetime.now(timezone.utc)
             if self.started_at:
                 self.processing_time = (self.completed_at - self.started_at).total_seconds()
+        
+        return True
 
 class Slide(db.Model):
     """Model for individual slides extracted from videos."""
@@ -147,23 +201,26 @@ class Slide(db.Model):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert slide to dictionary for API responses."""
+        (filename, slide_number, image_path, thumbnail_path, timestamp, duration, title,
+         content, slide_type, keywords, concepts, transcription, description,
+         ocr_confidence, similarity_score, slide_metadata) = _SLIDE_GETTER(self)
         return {
-            'filename': self.filename,
-            'slide_number': self.slide_number,
-            'path': self.image_path,
-            'thumbnail_path': self.thumbnail_path,
-            'timestamp': self.timestamp,
-            'duration': self.duration,
-            'title': self.title,
-            'content': self.content,
-            'type': self.slide_type,
-            'keywords': self.keywords or [],
-            'concepts': self.concepts or [],
-            'transcription': self.transcription,
-            'description': self.description,
-            'ocr_confidence': self.ocr_confidence,
-            'similarity_score': self.similarity_score,
-            'metadata': self.slide_metadata or {}
+            'filename': filename,
+            'slide_number': slide_number,
+            'path': image_path,
+            'thumbnail_path': thumbnail_path,
+            'timestamp': timestamp,
+            'duration': duration,
+            'title': title,
+            'content': content,
+            'type': slide_type,
+            'keywords': keywords or [],
+            'concepts': concepts or [],
+            'transcription': transcription,
+            'description': description,
+            'ocr_confidence': ocr_confidence,
+            'similarity_score': similarity_score,
+            'metadata': slide_metadata or {}
         }
 
 class JobMetrics(db.Model):
@@ -212,20 +269,4 @@ class JobMetrics(db.Model):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert metrics to dictionary for API responses."""
-        return {
-            'job_id': self.job_id,
-            'download_time': self.download_time,
-            'extraction_time': self.extraction_time,
-            'analysis_time': self.analysis_time,
-            'total_processing_time': self.total_processing_time,
-            'peak_memory_usage': self.peak_memory_usage,
-            'cpu_usage': self.cpu_usage,
-            'video_duration': self.video_duration,
-            'video_size': self.video_size,
-            'frames_processed': self.frames_processed,
-            'slides_extracted': self.slides_extracted,
-            'duplicates_removed': self.duplicates_removed,
-            'average_ocr_confidence': self.average_ocr_confidence,
-            'errors_count': self.errors_count,
-            'warnings_count': self.warnings_count
-        }
+        return dict(zip(_METRICS_KEYS, _METRICS_GETTER(self)))
@@ -1,12 +1,27 @@
 import os
 import logging
+import hashlib
 import json
 import re
+import sqlite3
+import tempfile
+import threading
+from multiprocessing.util import Finalize
+from collections import Counter, OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import cv2
 import pytesseract
 from PIL import Image
 import numpy as np
 
+# tesserocr drives Tesseract in-process instead of spawning a subprocess per call
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +33,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger("OCRContextEnhancer")
 
+# Use OpenCV's CUDA module for the expensive filters when a GPU build is present
+try:
+    CUDA_AVAILABLE = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CUDA_AVAILABLE = False
+
+# Process-local state for enhance_ocr_batch workers
+_worker_enhancer = None
+_worker_transcription = None
+
+def _init_batch_worker(tesseract_config, cache_path, transcription_data):
+    """Create the enhancer reused by every task in a batch worker process."""
+    global _worker_enhancer, _worker_transcription
+    # Parallelism comes from the process pool; a small OCR pool per process keeps
+    # the number of loaded Tesseract instances bounded
+    _worker_enhancer = OCRContextEnhancer(
+        tesseract_config=tesseract_config, cache_path=cache_path,
+        ocr_threads=OCRContextEnhancer.BATCH_OCR_THREADS
+    )
+    _worker_transcription = transcription_data
+    # Release the enhancer's threads and Tesseract instances when the worker exits
+    Finalize(_worker_enhancer, _worker_enhancer.close, exitpriority=10)
+
+def _enhance_ocr_worker(task):
+    """Run enhance_ocr for one (image, timestamp) pair in a batch worker process."""
+    image, timestamp = task
+    return _worker_enhancer.enhance_ocr(image, timestamp, _worker_transcription)
+
 class OCRContextEnhancer:
     """
     Enhances OCR results by combining multiple approaches and integrating with transcription.
@@ -29,13 +72,53 @@ class OCRContextEnhancer:
     4. Context-aware text extraction
     """
     
-    def __init__(self, tesseract_config=None, transcription_service=None):
+    # Common words for validation, shared by all instances
+    _COMMON_WORDS = frozenset({
+        'the', 'and', 'for', 'with', 'this', 'that', 'from', 'have', 'not',
+        'are', 'was', 'were', 'will', 'would', 'should', 'could', 'can',
+        'may', 'might', 'must', 'shall', 'should', 'who', 'what', 'where',
+        'when', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
+        'most', 'other', 'some', 'such', 'than', 'too', 'very', 'one', 'two',
+        'three', 'four', 'five', 'first', 'last', 'next', 'example', 'note',
+        'definition', 'theorem', 'equation', 'function', 'variable', 'value',
+        'data', 'result', 'analysis', 'figure', 'table', 'chart', 'graph',
+        'slide', 'page', 'chapter', 'section', 'part', 'introduction', 'conclusion'
+    })
+    
+    # Quality score at which an OCR result is good enough to stop trying others
+    QUALITY_PLATEAU = 0.9
+    
+    # Maximum number of OCR results kept in memory
+    CACHE_SIZE = 512
+    
+    # OCR threads per enhancer inside enhance_ocr_batch worker processes
+    BATCH_OCR_THREADS = 1
+    
+    # dHash grid side; 32x32 difference bits keep individual text lines of a
+    # slide apart, so slides sharing a template get different cache keys
+    HASH_SIZE = 32
+    
+    # Frames taller than this are downscaled before OCR; slide text stays
+    # legible and Tesseract's runtime scales with pixel count
+    MAX_OCR_HEIGHT = 1200
+    
+    # Share of pixels in the darkest/lightest histogram bins above which a frame
+    # is treated as already binary and only the grayscale variant is OCR'd
+    HIGH_CONTRAST_RATIO = 0.85
+    
+    # Maximum number of parsed timestamp strings remembered
+    TIMESTAMP_CACHE_SIZE = 4096
+    
+    def __init__(self, tesseract_config=None, transcription_service=None, cache_path=None,
+                 ocr_threads=None):
         """
         Initialize the OCR Context Enhancer.
         
         Args:
             tesseract_config: Configuration for Tesseract OCR
             transcription_service: Optional GeminiTranscriptionService instance
+            cache_path: Optional SQLite file for persisting OCR results across runs
+            ocr_threads: Size of the OCR thread pool (defaults to twice the CPU count)
         """
         self.tesseract_config = tesseract_config or {
             'standard': '--psm 6 --oem 3',
@@ -44,20 +127,54 @@ class OCRContextEnhancer:
             'title': '--psm 7 --oem 3'
         }
         self.transcription_service = transcription_service
-        self.ocr_cache = {}
+        # LRU of image hash -> (text, quality), optionally backed by SQLite
+        self.ocr_cache = OrderedDict()
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        # Fingerprint of the OCR configuration; on-disk rows are keyed on it as
+        # well as the image hash, so enhancers sharing a cache_path with
+        # different configurations never read each other's results
+        config_digest = hashlib.blake2b(
+            json.dumps(self.tesseract_config, sort_keys=True).encode('utf-8'), digest_size=8
+        ).digest()
+        self._config_hash = int.from_bytes(config_digest, 'big', signed=True)
+        if cache_path:
+            try:
+                self._cache_db = sqlite3.connect(cache_path, check_same_thread=False)
+                self._cache_db.execute(
+                    "CREATE TABLE IF NOT EXISTS ocr_results "
+                    "(config_hash INTEGER, hash BLOB, result_json TEXT, PRIMARY KEY (config_hash, hash))"
+                )
+                self._cache_db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Could not open OCR cache {cache_path}: {e}")
+                self._cache_db = None
+        
+        # How often each "<image>_<config>" combination produced the best text;
+        # the most successful combinations are tried first
+        self._best_combo_counter = Counter({'gray_standard': 1})
+        
+        # Unsharp mask (1.5 * image - 0.5 * GaussianBlur(sigma=3)) fused into a single
+        # kernel; 19x19 is the size OpenCV derives for sigma=3 on 8-bit images
+        gaussian = cv2.getGaussianKernel(19, 3)
+        unsharp_kernel = -0.5 * (gaussian @ gaussian.T)
+        unsharp_kernel[9, 9] += 1.5
+        self._unsharp_kernel = unsharp_kernel.astype(np.float32)
+        
+        # Per-thread tesserocr API instances, keyed by config name. The OCR
+        # thread pool lives as long as the enhancer, so its threads (and their
+        # API instances, with the traineddata already loaded) serve every frame
+        self._tess_local = threading.local()
+        self._tess_apis = []
+        self._ocr_threads = ocr_threads or (os.cpu_count() or 1) * 2
+        self._ocr_executor = None
+        self._executor_lock = threading.Lock()
+        
+        # (transcription_data, prepared arrays) for the last transcription seen
+        self._prepared_transcription = None
         
         # Common words for validation
-        self.common_words = {
-            'the', 'and', 'for', 'with', 'this', 'that', 'from', 'have', 'not',
-            'are', 'was', 'were', 'will', 'would', 'should', 'could', 'can',
-            'may', 'might', 'must', 'shall', 'should', 'who', 'what', 'where',
-            'when', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
-            'most', 'other', 'some', 'such', 'than', 'too', 'very', 'one', 'two',
-            'three', 'four', 'five', 'first', 'last', 'next', 'example', 'note',
-            'definition', 'theorem', 'equation', 'function', 'variable', 'value',
-            'data', 'result', 'analysis', 'figure', 'table', 'chart', 'graph',
-            'slide', 'page', 'chapter', 'section', 'part', 'introduction', 'conclusion'
-        }
+        self.common_words = self._COMMON_WORDS
         
         # Educational patterns
         self.educational_patterns = [
@@ -72,6 +189,19 @@ class OCRContextEnhancer:
             r'algorithm\s*\d+'
         ]
         
+        # Precompiled scoring patterns; the educational patterns are combined into
+        # one alternation with a named group per pattern so a single scan suffices
+        self._word_re = re.compile(r'\b[a-zA-Z]{2,}\b')
+        self._digit_re = re.compile(r'\d')
+        self._edu_re = re.compile(
+            '|'.join(f'(?P<p{i}>{pattern})' for i, pattern in enumerate(self.educational_patterns)),
+            re.IGNORECASE
+        )
+        self._ts_re = re.compile(r'^(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)$')
+        
+        # Parsed timestamp strings -> seconds
+        self._ts_cache = {}
+        
     def enhance_ocr(self, image, timestamp=None, transcription_data=None):
         """
         Enhance OCR results using multiple techniques and transcription data.
@@ -88,31 +218,33 @@ class OCRContextEnhancer:
         if isinstance(image, Image.Image):
             image = np.array(image)
             
+        # Grayscale once; the result feeds both the cache key and preprocessing
+        try:
+            gray = self._to_gray(image)
+        except Exception as e:
+            logger.error(f"Error converting image to grayscale: {e}")
+            gray = None
+        
         # Compute image hash for caching
-        image_hash = self._compute_image_hash(image)
+        image_hash = self._compute_image_hash(gray if gray is not None else image)
         
-        # Check cache
-        if image_hash in self.ocr_cache:
-            return self.ocr_cache[image_hash]
+        # Check cache; only the OCR outcome is cached since the transcription
+        # context depends on the timestamp of each call
+        cached = self._cache_get(image_hash)
+        if cached:
+            best_result, quality_score = cached
+        else:
+            # Apply multiple preprocessing techniques
+            preprocessed_images = self._preprocess_batch([image], [gray])[0]
             
-        # Apply multiple preprocessing techniques
-        preprocessed_images = self._preprocess_image(image)
-        
-        # Extract text using multiple OCR configurations
-        ocr_results = {}
-        for name, img in preprocessed_images.items():
-            for config_name, config in self.tesseract_config.items():
-                key = f"{name}_{config_name}"
-                try:
-                    pil_img = Image.fromarray(img)
-                    text = pytesseract.image_to_string(pil_img, config=config)
-                    ocr_results[key] = text.strip()
-                except Exception as e:
-                    logger.error(f"OCR error with {key}: {e}")
-                    ocr_results[key] = ""
-        
-        # Evaluate and select the best OCR result
-        best_result, quality_score = self._select_best_ocr_result(ocr_results)
+            # Extract text using multiple OCR configurations
+            ocr_results = self._run_ocr(preprocessed_images)
+            
+            # Evaluate and select the best OCR result
+            best_result, quality_score = self._select_best_ocr_result(ocr_results)
+            
+            # Cache the result
+            self._cache_put(image_hash, (best_result, quality_score))
         
         # Get transcription context if available
         transcription_text = ""
@@ -133,28 +265,312 @@ class OCRContextEnhancer:
             'transcription': transcription_text
         }
         
-        # Cache the result
-        self.ocr_cache[image_hash] = result
+        return result
+    
+    @classmethod
+    def enhance_ocr_batch(cls, images, timestamps=None, transcription_data=None,
+                          workers=None, tesseract_config=None, cache_path=None):
+        """
+        Enhance OCR for many slides concurrently using a process pool.
+        
+        Each worker process builds one enhancer and reuses it, so its caches
+        and prepared transcription persist across the slides it handles. The
+        workers' enhancers use BATCH_OCR_THREADS OCR threads each and are
+        closed when their process exits.
+        
+        Args:
+            images: List of input images (numpy arrays or PIL Images)
+            timestamps: Optional list of timestamps, one per image
+            transcription_data: Optional transcription data shared by all images
+            workers: Number of worker processes (defaults to the CPU count)
+            tesseract_config: Configuration for Tesseract OCR
+            cache_path: Optional SQLite file for persisting OCR results across runs
+            
+        Returns:
+            List of enhanced OCR result dictionaries, in input order
+        """
+        if timestamps is None:
+            timestamps = [None] * len(images)
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(tesseract_config, cache_path, transcription_data)
+        ) as executor:
+            return list(executor.map(_enhance_ocr_worker, zip(images, timestamps)))
+    
+    def close(self):
+        """Shut down the OCR thread pool and release the tesserocr APIs and the on-disk cache."""
+        with self._executor_lock:
+            executor, self._ocr_executor = self._ocr_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        
+        with self._executor_lock:
+            apis, self._tess_apis = self._tess_apis, []
+        for api in apis:
+            api.End()
+        self._tess_local = threading.local()
+        
+        with self._cache_lock:
+            if self._cache_db is not None:
+                self._cache_db.close()
+                self._cache_db = None
+    
+    def _get_ocr_executor(self):
+        """Return the enhancer's OCR thread pool, creating it on first use."""
+        with self._executor_lock:
+            if self._ocr_executor is None:
+                self._ocr_executor = ThreadPoolExecutor(
+                    max_workers=self._ocr_threads, thread_name_prefix="ocr"
+                )
+            return self._ocr_executor
+    
+    def _cache_get(self, image_hash):
+        """Look up an OCR result in the in-memory LRU, then the on-disk cache."""
+        with self._cache_lock:
+            if image_hash in self.ocr_cache:
+                self.ocr_cache.move_to_end(image_hash)
+                return self.ocr_cache[image_hash]
+            
+            if self._cache_db is None:
+                return None
+            
+            try:
+                row = self._cache_db.execute(
+                    "SELECT result_json FROM ocr_results WHERE config_hash = ? AND hash = ?",
+                    (self._config_hash, self._hash_blob(image_hash))
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Error reading OCR cache: {e}")
+                return None
+        
+        if not row:
+            return None
         
+        result = tuple(json.loads(row[0]))
+        self._cache_put(image_hash, result, persist=False)
         return result
     
-    def _preprocess_image(self, image):
+    def _cache_put(self, image_hash, result, persist=True):
+        """Store an OCR result, evicting the least recently used entry when full."""
+        with self._cache_lock:
+            self.ocr_cache[image_hash] = result
+            self.ocr_cache.move_to_end(image_hash)
+            if len(self.ocr_cache) > self.CACHE_SIZE:
+                self.ocr_cache.popitem(last=False)
+            
+            if persist and self._cache_db is not None:
+                try:
+                    self._cache_db.execute(
+                        "INSERT OR REPLACE INTO ocr_results (config_hash, hash, result_json) VALUES (?, ?, ?)",
+                        (self._config_hash, self._hash_blob(image_hash), json.dumps(result))
+                    )
+                    self._cache_db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing OCR cache: {e}")
+    
+    def _run_ocr(self, preprocessed_images):
+        """
+        Run the Tesseract configurations on the preprocessed images.
+        
+        With tesserocr installed, images are recognised in-process; otherwise
+        each image is encoded to a temporary PNG once and shared by all
+        pytesseract calls. The combination that has won most often so far runs
+        first on its own; if its text already scores at least
+        QUALITY_PLATEAU the remaining combinations are skipped. Otherwise
+        the rest run in parallel on the enhancer's thread pool, and calls not
+        yet started are cancelled as soon as any result reaches the plateau.
+        
+        Args:
+            preprocessed_images: Dictionary of preprocessed images
+            
+        Returns:
+            Dictionary mapping "<image>_<config>" to OCR text
+        """
+        ocr_results = {}
+        
+        temp_context = nullcontext() if TESSEROCR_AVAILABLE else tempfile.TemporaryDirectory(prefix="ocr_")
+        with temp_context as temp_dir:
+            tasks = []
+            for name, img in preprocessed_images.items():
+                source = img
+                if temp_dir:
+                    source = os.path.join(temp_dir, f"{name}.png")
+                    if not cv2.imwrite(source, img):
+                        logger.error(f"Could not write preprocessed image {name}")
+                        continue
+                for config_name, config in self.tesseract_config.items():
+                    tasks.append((f"{name}_{config_name}", source, config_name, config))
+            
+            if not tasks:
+                return ocr_results
+            
+            # Historically best combinations first (sort is stable for ties)
+            tasks.sort(key=lambda task: -self._best_combo_counter[task[0]])
+            
+            key, source, config_name, config = tasks[0]
+            try:
+                ocr_results[key] = self._ocr_image(source, config_name, config)
+            except Exception as e:
+                logger.error(f"OCR error with {key}: {e}")
+                ocr_results[key] = ""
+            
+            seen_texts = {ocr_results[key]}
+            if self._calculate_text_quality(ocr_results[key]) >= self.QUALITY_PLATEAU:
+                return ocr_results
+            
+            remaining = tasks[1:]
+            if remaining:
+                executor = self._get_ocr_executor()
+                futures = {
+                    executor.submit(self._ocr_image, source, config_name, config): key
+                    for key, source, config_name, config in remaining
+                }
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    key = futures[future]
+                    try:
+                        ocr_results[key] = future.result()
+                    except Exception as e:
+                        logger.error(f"OCR error with {key}: {e}")
+                        ocr_results[key] = ""
+                    
+                    # Texts already scored below the plateau need no rescoring
+                    text = ocr_results[key]
+                    if text in seen_texts:
+                        continue
+                    seen_texts.add(text)
+                    if self._calculate_text_quality(text) >= self.QUALITY_PLATEAU:
+                        for pending in futures:
+                            pending.cancel()
+        
+        # Keep task order so ties in result selection resolve deterministically
+        return {task[0]: ocr_results[task[0]] for task in tasks if task[0] in ocr_results}
+    
+    def _ocr_image(self, source, config_name, config):
+        """
+        Recognise text in one image with one Tesseract configuration.
+        
+        Args:
+            source: Image array (tesserocr) or path to an image file (pytesseract)
+            config_name: Name of the configuration
+            config: Tesseract command-line configuration string
+            
+        Returns:
+            Recognised text, stripped
+        """
+        if not TESSEROCR_AVAILABLE:
+            return pytesseract.image_to_string(source, config=config).strip()
+        
+        # Hand the raw uint8 buffer to Tesseract without building a PIL image
+        image = np.ascontiguousarray(source)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        api = self._get_tesserocr_api(config_name, config)
+        api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        return api.GetUTF8Text().strip()
+    
+    def _get_tesserocr_api(self, config_name, config):
+        """
+        Get the calling thread's tesserocr API for a configuration.
+        
+        PyTessBaseAPI instances are not thread-safe, so each thread keeps its
+        own, created on first use. The OCR pool's threads outlive a single
+        frame, so their instances are reused across frames until close()
+        releases them. Only the --psm and --oem options of the configuration
+        string are applied.
+        """
+        apis = getattr(self._tess_local, 'apis', None)
+        if apis is None:
+            apis = self._tess_local.apis = {}
+        
+        api = apis.get(config_name)
+        if api is None:
+            psm = re.search(r'--psm\s+(\d+)', config)
+            oem = re.search(r'--oem\s+(\d+)', config)
+            api = PyTessBaseAPI(
+                psm=int(psm.group(1)) if psm else PSM.AUTO,
+                oem=int(oem.group(1)) if oem else OEM.DEFAULT
+            )
+            apis[config_name] = api
+            with self._executor_lock:
+                self._tess_apis.append(api)
+        return api
+    
+    def _preprocess_batch(self, images, grays=None):
+        """
+        Preprocess several images, running the bilateral filter on the GPU
+        when OpenCV was built with CUDA.
+        
+        Args:
+            images: List of input images (numpy arrays)
+            grays: Optional list of grayscale images already computed by _to_gray
+            
+        Returns:
+            List of dictionaries of preprocessed images
+        """
+        grays = grays or [None] * len(images)
+        if not CUDA_AVAILABLE:
+            return [self._preprocess_image(image, gray) for image, gray in zip(images, grays)]
+        
+        results = []
+        stream = cv2.cuda.Stream()
+        gpu_gray = cv2.cuda_GpuMat()
+        for image, gray in zip(images, grays):
+            bilateral = None
+            try:
+                if gray is None:
+                    gray = self._to_gray(image)
+                if not self._is_high_contrast(gray):
+                    gpu_gray.upload(gray, stream)
+                    gpu_bilateral = cv2.cuda.bilateralFilter(gpu_gray, 9, 75, 75, stream=stream)
+                    bilateral = gpu_bilateral.download(stream)
+                    stream.waitForCompletion()
+            except cv2.error as e:
+                logger.error(f"CUDA preprocessing failed, using CPU: {e}")
+            results.append(self._preprocess_image(image, gray, bilateral))
+        return results
+    
+    def _to_gray(self, image):
+        """
+        Convert a frame to grayscale, downscaling frames taller than
+        MAX_OCR_HEIGHT so every later step works on the smaller image.
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        if gray.shape[0] > self.MAX_OCR_HEIGHT:
+            scale = self.MAX_OCR_HEIGHT / gray.shape[0]
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray
+    
+    def _preprocess_image(self, image, gray=None, bilateral=None):
         """
         Apply multiple preprocessing techniques to improve OCR.
         
         Args:
             image: Input image (numpy array)
+            gray: Optional grayscale image already computed by _to_gray
+            bilateral: Optional precomputed bilateral-filtered image
             
         Returns:
             Dictionary of preprocessed images
         """
-        results = {'original': image}
+        # Only single-channel variants are OCR'd; Tesseract grayscales colour input itself,
+        # so the original frame would just duplicate the 'gray' results
+        results = {}
         
         try:
             # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = self._to_gray(image)
             results['gray'] = gray
             
+            # Clean rendered slides are already near-binary; the other variants
+            # would only repeat the same OCR work
+            if self._is_high_contrast(gray):
+                return results
+            
             # Apply adaptive thresholding
             adaptive_threshold = cv2.adaptiveThreshold(
                 gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
@@ -166,19 +582,28 @@ class OCRContextEnhancer:
             results['otsu'] = otsu
             
             # Apply bilateral filter for noise reduction while preserving edges
-            bilateral = cv2.bilateralFilter(gray, 9, 75, 75)
+            if bilateral is None:
+                bilateral = cv2.bilateralFilter(gray, 9, 75, 75)
             results['bilateral'] = bilateral
             
             # Apply unsharp masking for sharpening
-            gaussian = cv2.GaussianBlur(gray, (0, 0), 3)
-            unsharp = cv2.addWeighted(gray, 1.5, gaussian, -0.5, 0)
+            unsharp = cv2.filter2D(gray, -1, self._unsharp_kernel)
             results['unsharp'] = unsharp
             
         except Exception as e:
             logger.error(f"Error in image preprocessing: {e}")
+            # Still OCR the raw frame if not even the grayscale conversion succeeded
+            if not results:
+                results['original'] = image
             
         return results
     
+    def _is_high_contrast(self, gray):
+        """Check whether a grayscale image is concentrated in its darkest and lightest bins."""
+        hist = cv2.calcHist([gray], [0], None, [8], [0, 256])
+        total = hist.sum()
+        return total > 0 and (hist[0][0] + hist[-1][0]) / total > self.HIGH_CONTRAST_RATIO
+    
     def _select_best_ocr_result(self, ocr_results):
         """
         Select the best OCR result from multiple attempts.
@@ -191,21 +616,30 @@ class OCRContextEnhancer:
         """
         best_text = ""
         best_score = 0
+        best_key = None
         
+        # Variants often produce identical text; score each distinct text once,
+        # attributed to the first combination that produced it
+        unique_results = {}
         for key, text in ocr_results.items():
-            if not text:
-                continue
-                
+            if text:
+                unique_results.setdefault(text, key)
+        
+        for text, key in unique_results.items():
             # Calculate quality score
             score = self._calculate_text_quality(text)
             
             if score > best_score:
                 best_score = score
                 best_text = text
+                best_key = key
         
-        # If all results are empty or poor quality, use the original OCR
-        if not best_text and 'original_standard' in ocr_results:
-            best_text = ocr_results['original_standard']
+        if best_key:
+            self._best_combo_counter[best_key] += 1
+        
+        # If all results are empty or poor quality, use the plain grayscale OCR
+        if not best_text and 'gray_standard' in ocr_results:
+            best_text = ocr_results['gray_standard']
             
         return best_text, best_score
     
@@ -223,19 +657,21 @@ class OCRContextEnhancer:
             return 0.0
             
         # Split into words
-        words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
+        words = self._word_re.findall(text.lower())
         
         if not words:
             return 0.0
             
-        # Count valid words
-        valid_words = sum(1 for word in words if word in self.common_words)
+        # Count valid words: intersect the distinct words with the common set,
+        # then weight each hit by its number of occurrences
+        word_counts = Counter(words)
+        valid_words = sum(word_counts[word] for word in self.common_words.intersection(word_counts))
         
-        # Check for educational patterns
+        # Check for educational patterns (each distinct pattern counts once); every
+        # pattern ends in a number, so text without digits cannot match
         pattern_matches = 0
-        for pattern in self.educational_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                pattern_matches += 1
+        if self._digit_re.search(text):
+            pattern_matches = len({match.lastgroup for match in self._edu_re.finditer(text)})
         
         # Calculate base score from valid word ratio
         base_score = valid_words / max(1, len(words))
@@ -262,19 +698,51 @@ class OCRContextEnhancer:
         if not transcription_data or 'segments' not in transcription_data:
             return ""
             
-        segments = transcription_data.get('segments', [])
-        relevant_text = []
+        starts, ends, texts, ends_sorted = self.prepare_transcription(transcription_data)
+        
+        # Use a window around the timestamp (5 seconds before and after):
+        # a segment is relevant when start <= timestamp + 5 and end >= timestamp - 5
+        hi = np.searchsorted(starts, timestamp + 5, 'right')
+        if ends_sorted:
+            lo = np.searchsorted(ends[:hi], timestamp - 5, 'left')
+            return " ".join(texts[lo:hi])
         
-        # Find segments that overlap with the timestamp
-        for segment in segments:
-            start = self._convert_to_seconds(segment.get('start', 0))
-            end = self._convert_to_seconds(segment.get('end', 0))
+        relevant = np.nonzero(ends[:hi] >= timestamp - 5)[0]
+        return " ".join(texts[i] for i in relevant)
+    
+    def prepare_transcription(self, transcription_data):
+        """
+        Convert transcription segments into sorted arrays for fast window lookups.
+        
+        The result is cached for the most recently used transcription object,
+        so timestamps are parsed once per transcription rather than once per frame.
+        
+        Args:
+            transcription_data: Transcription data dictionary
             
-            # Use a window around the timestamp (5 seconds before and after)
-            if start - 5 <= timestamp <= end + 5:
-                relevant_text.append(segment.get('text', ''))
+        Returns:
+            Tuple of (starts, ends, texts, ends_sorted) with segments ordered by start
+        """
+        cached = self._prepared_transcription
+        if cached is not None and cached[0] is transcription_data:
+            return cached[1]
+        
+        segments = sorted(
+            ((self._convert_to_seconds(segment.get('start', 0)),
+              self._convert_to_seconds(segment.get('end', 0)),
+              segment.get('text', ''))
+             for segment in transcription_data.get('segments', [])),
+            key=lambda segment: segment[0]
+        )
+        starts = np.array([segment[0] for segment in segments], dtype=np.float64)
+        ends = np.array([segment[1] for segment in segments], dtype=np.float64)
+        texts = [segment[2] for segment in segments]
+        # Binary search on ends is only valid when segments do not nest
+        ends_sorted = bool(np.all(ends[1:] >= ends[:-1]))
         
-        return " ".join(relevant_text)
+        prepared = (starts, ends, texts, ends_sorted)
+        self._prepared_transcription = (transcription_data, prepared)
+        return prepared
     
     def _convert_to_seconds(self, timestamp):
         """Convert timestamp to seconds."""
@@ -282,34 +750,51 @@ class OCRContextEnhancer:
             return float(timestamp)
         
         if isinstance(timestamp, str):
-            # Try to parse time format
-            if ':' in timestamp:
-                parts = timestamp.split(':')
-                if len(parts) == 2:  # MM:SS
-                    return int(parts[0]) * 60 + float(parts[1])
-                elif len(parts) == 3:  # HH:MM:SS
-                    return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-            
-            # Try direct conversion
-            try:
-                return float(timestamp)
-            except ValueError:
-                pass
+            seconds = self._ts_cache.get(timestamp)
+            if seconds is None:
+                seconds = self._parse_timestamp(timestamp)
+                if len(self._ts_cache) >= self.TIMESTAMP_CACHE_SIZE:
+                    self._ts_cache.clear()
+                self._ts_cache[timestamp] = seconds
+            return seconds
         
         return 0.0
     
+    def _parse_timestamp(self, timestamp):
+        """Parse a timestamp string into seconds."""
+        # Try to parse time format (MM:SS or HH:MM:SS)
+        match = self._ts_re.match(timestamp)
+        if match:
+            hours, minutes, seconds = match.groups()
+            return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+        
+        # Try direct conversion
+        try:
+            return float(timestamp)
+        except ValueError:
+            return 0.0
+    
     def _compute_image_hash(self, image):
-        """Compute a simple hash for an image for caching purposes."""
+        """
+        Compute a perceptual difference hash (dHash) for caching purposes.
+        
+        Comparing adjacent pixels rather than the mean makes the hash robust
+        to global brightness shifts between frames of the same slide.
+        """
         try:
-            # Resize to small dimensions for faster hashing
-            small = cv2.resize(image, (32, 32))
-            # Convert to grayscale
+            # Resize to (HASH_SIZE + 1) x HASH_SIZE so each row yields HASH_SIZE horizontal differences
+            small = cv2.resize(image, (self.HASH_SIZE + 1, self.HASH_SIZE), interpolation=cv2.INTER_AREA)
+            # Callers normally pass the grayscale frame; convert if given colour input
             gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if len(small.shape) == 3 else small
-            # Compute mean hash
-            avg = gray.mean()
-            hash_value = ''.join('1' if v > avg else '0' for v in gray.flatten())
-            return hash_value
+            # 1024 difference bits as a single int: cheap to hash and compare as a dict key
+            diff = gray[:, 1:] > gray[:, :-1]
+            return int.from_bytes(np.packbits(diff).tobytes(), 'big')
         except Exception as e:
             logger.error(f"Error computing image hash: {e}")
-            # Fallback to a timestamp-based hash
-            return str(hash(image.tobytes()))
+            # Fallback to an exact content digest, stable across runs
+            digest = hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+            return int.from_bytes(digest, 'big')
+    
+    def _hash_blob(self, image_hash):
+        """Fixed-width bytes of an image hash, used as the on-disk cache key."""
+        return image_hash.to_bytes(self.HASH_SIZE * self.HASH_SIZE // 8, 'big')
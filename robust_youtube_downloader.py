@@ -6,22 +6,122 @@ Designed for maximum success rate on cloud platforms like Render.com
 
 import os
 import sys
+import asyncio
+import threading
 import time
 import random
 import logging
 import tempfile
 import subprocess
+import shutil
+import sqlite3
 import requests
 import json
+import re
+import functools
+import importlib
+from collections import deque
 from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("RobustYouTubeDownloader")
 
+# Matches every supported YouTube URL form in a single pass
+_VIDEO_ID_RE = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|v/)|youtu\.be/)([a-zA-Z0-9_-]{11})')
+
+# youtube-dl output that means the download can never succeed
+YTDL_FATAL_ERRORS = (
+    'ERROR: Private video',
+    'ERROR: Video unavailable',
+    'This video is unavailable',
+    'Sign in to confirm your age',
+)
+
+# Extensions the download methods may produce for the video itself
+VIDEO_EXTS = frozenset(('.mp4', '.webm', '.mkv', '.avi', '.mov', '.flv'))
+
+def _find_downloaded_files(output_dir: str, since: float) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the video and .info.json written to output_dir since a start time.
+    
+    Files older than the download are ignored, so a reused directory never
+    hands back a previous run's video; the scan stops once both are found.
+    """
+    video_path = None
+    info_path = None
+    since -= 1.0  # Tolerate coarse filesystem timestamps
+    with os.scandir(output_dir) as it:
+        for entry in it:
+            name = entry.name
+            if video_path is None and os.path.splitext(name)[1].lower() in VIDEO_EXTS:
+                if entry.stat().st_mtime >= since:
+                    video_path = entry.path
+            elif info_path is None and name.endswith('.info.json'):
+                if entry.stat().st_mtime >= since:
+                    info_path = entry.path
+            if video_path and info_path:
+                break
+    return video_path, info_path
+
+# Browser user agents rotated across requests
+_UA_POOL = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+)
+
+# Static portion of the simulated browser headers; only User-Agent varies per request
+_STATIC_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"'
+}
+
+@functools.lru_cache(maxsize=None)
+def _lazy_import(module_name: str):
+    """Import a heavy download backend on first use and memoize the module"""
+    return importlib.import_module(module_name)
+
+def _requested_filepath(info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Path yt-dlp reports for the file it just downloaded, if it still exists"""
+    downloads = (info or {}).get('requested_downloads') or []
+    filepath = downloads[0].get('filepath') if downloads else None
+    return filepath if filepath and os.path.exists(filepath) else None
+
+class DownloadStalled(Exception):
+    """Raised from a yt-dlp progress hook when throughput stays below the stall threshold"""
+
+class DownloadCancelled(Exception):
+    """Raised inside a losing download method once another method has won the race"""
+
+def _check_stop(stop: Optional[threading.Event]):
+    """Abort the calling download method if its race has already been won"""
+    if stop is not None and stop.is_set():
+        raise DownloadCancelled("Another download method already succeeded")
+
 class DownloadResult:
     """Container for download results"""
     def __init__(self, success: bool, video_path: str = None, audio_path: str = None, 
@@ -37,18 +137,25 @@ class RequestThrottler:
     """Intelligent request throttling to avoid rate limits"""
     
     def __init__(self):
-        self.request_history = []
+        self.request_history = deque()
         self.min_interval = 2.0  # Minimum seconds between requests
         self.max_requests_per_minute = 10
         self.backoff_factor = 1.5
         self.current_delay = self.min_interval
+        # Download methods may run concurrently; serialize access to the history
+        self._lock = threading.Lock()
     
     def wait_if_needed(self):
         """Wait if necessary to avoid rate limiting"""
+        with self._lock:
+            self._wait_if_needed()
+    
+    def _wait_if_needed(self):
         now = time.time()
         
-        # Clean old requests (older than 1 minute)
-        self.request_history = [t for t in self.request_history if now - t < 60]
+        # Clean old requests (older than 1 minute); history is in time order
+        while self.request_history and now - self.request_history[0] >= 60:
+            self.request_history.popleft()
         
         # Check if we're hitting rate limits
         if len(self.request_history) >= self.max_requests_per_minute:
@@ -76,37 +183,18 @@ class BrowserSimulator:
     @staticmethod
     def get_realistic_headers() -> Dict[str, str]:
         """Generate realistic browser headers"""
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15"
-        ]
-        
-        return {
-            'User-Agent': random.choice(user_agents),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"'
-        }
+        # Fresh dict each call: callers such as yt-dlp may mutate the headers they get
+        return {'User-Agent': random.choice(_UA_POOL), **_STATIC_HEADERS}
     
     @staticmethod
-    def get_ytdlp_config(output_dir: str) -> Dict[str, Any]:
+    def get_ytdlp_config(output_dir: str, concurrent_fragments: int = 4) -> Dict[str, Any]:
         """Get optimized yt-dlp configuration for cloud environments"""
         headers = BrowserSimulator.get_realistic_headers()
         
+        # Set CLOUD_CONSERVATIVE=1 to fall back to a single connection per download
+        if os.getenv('CLOUD_CONSERVATIVE') == '1':
+            concurrent_fragments = 1
+        
         return {
             # Output settings
             'outtmpl': os.path.join(output_dir, '%(title)s.%(ext)s'),
@@ -131,10 +219,12 @@ class BrowserSimulator:
             'no_warnings': False,
             'skip_unavailable_fragments': True,
             'keep_fragments': False,
+            'updatetime': False,  # Keep local mtimes so fresh downloads can be told apart
             
             # Performance optimizations
-            'concurrent_fragment_downloads': 1,  # Conservative for cloud
-            'http_chunk_size': 1048576,  # 1MB chunks
+            # Parallel connections win back bandwidth YouTube throttles per connection
+            'concurrent_fragment_downloads': concurrent_fragments,
+            'http_chunk_size': 10485760,  # 10MB chunks
             
             # Metadata
             'writeinfojson': True,
@@ -161,7 +251,6 @@ class BrowserSimulator:
             # Additional anti-detection measures
             'extractor_args': {
                 'youtube': {
-                    'skip': ['hls', 'dash'],  # Prefer direct downloads
                     'player_skip': ['configs'],
                 }
             }
@@ -170,41 +259,116 @@ class BrowserSimulator:
 class RobustYouTubeDownloader:
     """Main downloader class with multiple fallback methods"""
     
-    def __init__(self, output_dir: str = None, enable_proxy: bool = False):
+    # Number of video download methods allowed to run at the same time
+    RACE_CONCURRENCY = 2
+    # A yt-dlp download averaging under STALL_MIN_RATE bytes/s over STALL_WINDOW
+    # seconds is aborted, freeing its race slot for the next method
+    STALL_MIN_RATE = 50 * 1024
+    STALL_WINDOW = 15.0
+    # Concurrent oembed checks and concurrent video downloads in download_many
+    CHECK_CONCURRENCY = 64
+    BULK_DOWNLOAD_CONCURRENCY = 4
+    # Seconds a cached accessibility result stays valid
+    META_CACHE_TTL = 3600
+    # oembed statuses that definitely mean the video is unavailable; other
+    # failures (429, 5xx, bot checks) may be transient and are not cached
+    INACCESSIBLE_STATUSES = frozenset({401, 403, 404})
+    # Method errors caused by the environment rather than the network; never retried
+    NON_RETRYABLE_ERRORS = frozenset({
+        "Proxy not enabled",
+        "No proxy configuration found",
+        "youtube-dl not available",
+        "Could not extract video ID",
+    })
+    # Bytes of encoded transcript buffered between writes in _write_transcript
+    TRANSCRIPT_BUFFER_SIZE = 1024 * 1024
+    # Downloads one cached YoutubeDL serves before it is rebuilt with a fresh user agent
+    YDL_REUSE_LIMIT = 5
+    # Whether the youtube-dl binary is on PATH; resolved once per process
+    _ytdl_available: Optional[bool] = None
+    
+    def __init__(self, output_dir: str = None, enable_proxy: bool = False, meta_cache_path: str = None):
         self.output_dir = output_dir or tempfile.mkdtemp(prefix="youtube_downloads_")
         self.enable_proxy = enable_proxy
         self.throttler = RequestThrottler()
         self.browser_sim = BrowserSimulator()
         
+        # Keep-alive session so repeated accessibility checks reuse one TLS connection
+        self._session = requests.Session()
+        self._session.headers.update(self.browser_sim.get_realistic_headers())
+        
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
         
         # Cache for successful configurations
         self.success_cache = {}
         
+        # Idle warm YoutubeDL instances, (ydl, stall_hook, uses); not tied to a
+        # directory, so every video in a download_many batch can reuse them
+        self._ydl_pool = []
+        self._ydl_lock = threading.Lock()
+        
+        # Persistent per-video accessibility cache shared across downloader
+        # instances, so repeat URLs skip the oembed check
+        meta_cache_path = meta_cache_path or os.path.join(tempfile.gettempdir(), 'ytmeta.sqlite')
+        self._meta_lock = threading.Lock()
+        try:
+            self._meta_db = sqlite3.connect(meta_cache_path, check_same_thread=False)
+            self._meta_db.execute(
+                "CREATE TABLE IF NOT EXISTS meta "
+                "(video_id TEXT PRIMARY KEY, accessible INTEGER, ts REAL)"
+            )
+            self._meta_db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open metadata cache {meta_cache_path}: {e}")
+            self._meta_db = None
+        
         logger.info(f"RobustYouTubeDownloader initialized with output_dir: {self.output_dir}")
     
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extract video ID from various YouTube URL formats"""
-        import re
-        
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/v/([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/watch\?.*v=([a-zA-Z0-9_-]{11})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = _VIDEO_ID_RE.search(url)
+        return match.group(1) if match else None
     
-    def _get_cache_key(self, url: str, method: str) -> str:
+    def _get_cache_key(self, url: str, method: str) -> Tuple[Optional[str], str]:
         """Generate cache key for successful configurations"""
-        video_id = self._extract_video_id(url)
-        return hashlib.md5(f"{video_id}_{method}".encode()).hexdigest()
+        # Only ever used as a dict key, so the tuple itself is the key; no hashing needed
+        return (self._extract_video_id(url), method)
+    
+    def _meta_get(self, video_id: str) -> Optional[bool]:
+        """Return a video's cached accessibility, or None if missing or stale"""
+        if self._meta_db is None or not video_id:
+            return None
+        try:
+            with self._meta_lock:
+                row = self._meta_db.execute(
+                    "SELECT accessible, ts FROM meta WHERE video_id = ?", (video_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading metadata cache: {e}")
+            return None
+        if not row or row[0] is None or time.time() - row[1] >= self.META_CACHE_TTL:
+            return None
+        return bool(row[0])
+    
+    def _meta_put(self, video_id: str, accessible: bool):
+        """Write through a video's accessibility to the metadata cache"""
+        if self._meta_db is None or not video_id:
+            return
+        try:
+            with self._meta_lock:
+                self._meta_db.execute(
+                    "INSERT OR REPLACE INTO meta (video_id, accessible, ts) VALUES (?, ?, ?)",
+                    (video_id, int(accessible), time.time())
+                )
+                self._meta_db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Error writing metadata cache: {e}")
+    
+    @staticmethod
+    def _oembed_url(video_id: str) -> str:
+        """oembed endpoint used for the accessibility check"""
+        return f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
     
     def _is_video_accessible(self, url: str) -> bool:
         """Quick check if video is accessible"""
@@ -213,88 +377,171 @@ class RobustYouTubeDownloader:
             if not video_id:
                 return False
             
+            cached = self._meta_get(video_id)
+            if cached is not None:
+                return cached
+            
             # Quick API check
-            check_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            headers = self.browser_sim.get_realistic_headers()
+            check_url = self._oembed_url(video_id)
             
-            response = requests.get(check_url, headers=headers, timeout=10)
-            return response.status_code == 200
+            # Only the status matters, so avoid transferring the body
+            response = self._session.head(check_url, timeout=10, allow_redirects=True)
+            if response.status_code == 405:
+                with self._session.get(check_url, timeout=10, stream=True) as response:
+                    pass
+            accessible = response.status_code == 200
+            if accessible or response.status_code in self.INACCESSIBLE_STATUSES:
+                self._meta_put(video_id, accessible=accessible)
+            return accessible
             
         except Exception as e:
             logger.warning(f"Accessibility check failed: {e}")
             return True  # Assume accessible if check fails
 
-    def _method_1_enhanced_ytdlp(self, url: str) -> DownloadResult:
-        """Method 1: Enhanced yt-dlp with advanced browser simulation"""
-        try:
-            import yt_dlp
-
-            logger.info("Attempting Method 1: Enhanced yt-dlp")
-            self.throttler.wait_if_needed()
-
-            config = self.browser_sim.get_ytdlp_config(self.output_dir)
+    def _make_stall_hook(self):
+        """Build a yt-dlp progress hook that aborts the download when throughput stalls"""
+        # The window opens on the first 'downloading' event, so extraction, throttling
+        # and yt-dlp's sleep intervals never count against the download rate
+        window = {'start': None, 'bytes': 0, 'stop': None}
+
+        def hook(d):
+            _check_stop(window['stop'])
+            status = d.get('status')
+            if status == 'finished':
+                # The next file (e.g. the audio stream) restarts its byte count
+                window['start'] = None
+                return
+            if status != 'downloading':
+                return
+            now = time.time()
+            downloaded = d.get('downloaded_bytes') or 0
+            if window['start'] is None:
+                window['start'] = now
+                window['bytes'] = downloaded
+                return
+            elapsed = now - window['start']
+            if elapsed < self.STALL_WINDOW:
+                return
+            rate = (downloaded - window['bytes']) / elapsed
+            if rate < self.STALL_MIN_RATE:
+                raise DownloadStalled(f"Download stalled at {rate / 1024:.1f} KB/s")
+            window['start'] = now
+            window['bytes'] = downloaded
+
+        def reset(stop: Optional[threading.Event] = None):
+            window['start'] = None
+            window['bytes'] = 0
+            window['stop'] = stop
+
+        hook.reset = reset
+        return hook
+
+    def _checkout_ydl(self, yt_dlp, output_dir: str, stop: Optional[threading.Event] = None):
+        """Take an idle pooled YoutubeDL (or build one) for exclusive use, pointed at output_dir"""
+        with self._ydl_lock:
+            entry = self._ydl_pool.pop() if self._ydl_pool else None
+        if entry is None:
+            config = self.browser_sim.get_ytdlp_config(output_dir)
+            # Relative template resolved against paths['home'], which is set per download
+            config['outtmpl'] = '%(title)s.%(ext)s'
 
             # Add random delays to appear more human
             config['sleep_interval'] = random.uniform(2.0, 4.0)
             config['sleep_interval_requests'] = random.uniform(1.0, 2.0)
+            stall_hook = self._make_stall_hook()
+            config['progress_hooks'] = [stall_hook]
+
+            entry = (yt_dlp.YoutubeDL(config), stall_hook, 0)
+        entry[0].params['paths'] = {'home': output_dir}
+        entry[1].reset(stop)
+        return entry
+
+    def _checkin_ydl(self, ydl, stall_hook, uses: int):
+        """Return a YoutubeDL to the pool, retiring it once it has served YDL_REUSE_LIMIT downloads"""
+        if uses < self.YDL_REUSE_LIMIT:
+            with self._ydl_lock:
+                if len(self._ydl_pool) < self.BULK_DOWNLOAD_CONCURRENCY:
+                    self._ydl_pool.append((ydl, stall_hook, uses))
+                    return
+        ydl.close()
+
+    def _ytdlp_download(self, ydl, url: str, output_dir: str, start: float) -> DownloadResult:
+        """Download one video with a checked-out YoutubeDL for method 1"""
+        # Download the video; the info this returns is the real one, so no separate probe is needed
+        info = ydl.extract_info(url, download=True)
+
+        # yt-dlp reports exactly where it wrote the video; scan the directory only if it did not
+        video_path = _requested_filepath(info)
+        info_path = None
+        if not video_path:
+            video_path, info_path = _find_downloaded_files(output_dir, start)
+
+        if video_path and os.path.exists(video_path):
+            self.throttler.reset_delay()
+
+            # Fall back to the info.json on disk if yt-dlp returned no info
+            metadata = info
+            if not metadata and info_path and os.path.exists(info_path):
+                try:
+                    metadata = json.loads(Path(info_path).read_bytes())
+                except:
+                    pass
 
-            with yt_dlp.YoutubeDL(config) as ydl:
-                # Extract info first
-                info = ydl.extract_info(url, download=False)
-                if not info:
-                    return DownloadResult(False, error="Could not extract video info", method="enhanced_ytdlp")
-
-                # Download the video
-                ydl.download([url])
-
-                # Find downloaded files
-                video_path = None
-                info_path = None
-
-                for file in os.listdir(self.output_dir):
-                    if file.endswith(('.mp4', '.webm', '.mkv', '.avi')):
-                        video_path = os.path.join(self.output_dir, file)
-                    elif file.endswith('.info.json'):
-                        info_path = os.path.join(self.output_dir, file)
+            return DownloadResult(
+                success=True,
+                video_path=video_path,
+                metadata=metadata,
+                method="enhanced_ytdlp"
+            )
+        else:
+            return DownloadResult(False, error="Video file not found after download", method="enhanced_ytdlp")
 
-                if video_path and os.path.exists(video_path):
-                    self.throttler.reset_delay()
+    def _method_1_enhanced_ytdlp(self, url: str, output_dir: str = None,
+                                 stop: Optional[threading.Event] = None) -> DownloadResult:
+        """Method 1: Enhanced yt-dlp with advanced browser simulation"""
+        output_dir = output_dir or self.output_dir
+        try:
+            yt_dlp = _lazy_import('yt_dlp')
 
-                    # Load metadata if available
-                    metadata = info
-                    if info_path and os.path.exists(info_path):
-                        try:
-                            with open(info_path, 'r', encoding='utf-8') as f:
-                                metadata = json.load(f)
-                        except:
-                            pass
+            logger.info("Attempting Method 1: Enhanced yt-dlp")
+            self.throttler.wait_if_needed()
+            _check_stop(stop)
+            start = time.time()
 
-                    return DownloadResult(
-                        success=True,
-                        video_path=video_path,
-                        metadata=metadata,
-                        method="enhanced_ytdlp"
-                    )
-                else:
-                    return DownloadResult(False, error="Video file not found after download", method="enhanced_ytdlp")
+            # Reuse a warm YoutubeDL (extractors loaded, config parsed) when one is cached
+            ydl, stall_hook, uses = self._checkout_ydl(yt_dlp, output_dir, stop)
+            try:
+                result = self._ytdlp_download(ydl, url, output_dir, start)
+            except Exception:
+                ydl.close()
+                raise
+            self._checkin_ydl(ydl, stall_hook, uses + 1)
+            return result
 
         except Exception as e:
             logger.warning(f"Method 1 (Enhanced yt-dlp) failed: {e}")
             return DownloadResult(False, error=str(e), method="enhanced_ytdlp")
 
-    def _method_2_pytube(self, url: str) -> DownloadResult:
+    def _method_2_pytube(self, url: str, output_dir: str = None,
+                         stop: Optional[threading.Event] = None) -> DownloadResult:
         """Method 2: pytube with custom configuration"""
+        output_dir = output_dir or self.output_dir
         try:
-            from pytube import YouTube
+            YouTube = _lazy_import('pytube').YouTube
 
             logger.info("Attempting Method 2: pytube")
             self.throttler.wait_if_needed()
+            _check_stop(stop)
 
             # Custom headers for pytube
             headers = self.browser_sim.get_realistic_headers()
 
+            # pytube calls this after every chunk; raising aborts the download
+            def on_progress(stream, chunk, bytes_remaining):
+                _check_stop(stop)
+
             # Create YouTube object with custom headers
-            yt = YouTube(url)
+            yt = YouTube(url, on_progress_callback=on_progress)
 
             # Monkey patch the request headers
             if hasattr(yt, '_session'):
@@ -318,13 +565,14 @@ class RobustYouTubeDownloader:
 
             if not stream:
                 return DownloadResult(False, error="No suitable stream found", method="pytube")
+            _check_stop(stop)
 
             # Download with safe filename
             safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
             filename = f"{safe_title}.{stream.subtype}"
 
             video_path = stream.download(
-                output_path=self.output_dir,
+                output_path=output_dir,
                 filename=filename
             )
 
@@ -356,20 +604,34 @@ class RobustYouTubeDownloader:
             logger.warning(f"Method 2 (pytube) failed: {e}")
             return DownloadResult(False, error=str(e), method="pytube")
 
-    def _method_3_youtube_dl(self, url: str) -> DownloadResult:
+    @staticmethod
+    def _drain_output(proc: subprocess.Popen, stream, tail: deque):
+        """Read a youtube-dl pipe line by line into a bounded tail, killing it on fatal errors"""
+        for line in stream:
+            tail.append(line)
+            if any(marker in line for marker in YTDL_FATAL_ERRORS):
+                proc.kill()
+        stream.close()
+
+    def _method_3_youtube_dl(self, url: str, output_dir: str = None,
+                             stop: Optional[threading.Event] = None) -> DownloadResult:
         """Method 3: Original youtube-dl as fallback"""
+        output_dir = output_dir or self.output_dir
         try:
             logger.info("Attempting Method 3: youtube-dl")
-            self.throttler.wait_if_needed()
 
             # Check if youtube-dl is available
-            result = subprocess.run(['youtube-dl', '--version'],
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
+            if RobustYouTubeDownloader._ytdl_available is None:
+                RobustYouTubeDownloader._ytdl_available = shutil.which('youtube-dl') is not None
+            if not RobustYouTubeDownloader._ytdl_available:
                 return DownloadResult(False, error="youtube-dl not available", method="youtube-dl")
 
+            self.throttler.wait_if_needed()
+            _check_stop(stop)
+            start = time.time()
+
             # Prepare command
-            output_template = os.path.join(self.output_dir, '%(title)s.%(ext)s')
+            output_template = os.path.join(output_dir, '%(title)s.%(ext)s')
             headers = self.browser_sim.get_realistic_headers()
 
             cmd = [
@@ -382,22 +644,43 @@ class RobustYouTubeDownloader:
                 '--max-sleep-interval', '5',
                 '--retries', '3',
                 '--write-info-json',
+                '--no-mtime',
                 url
             ]
 
-            # Execute download
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-
-            if result.returncode == 0:
+            # Execute download, keeping only the tail of its output and killing it
+            # as soon as it reports an error that no amount of waiting will fix
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+            stdout_tail = deque(maxlen=200)
+            stderr_tail = deque(maxlen=200)
+            readers = [
+                threading.Thread(target=self._drain_output, args=(proc, proc.stdout, stdout_tail), daemon=True),
+                threading.Thread(target=self._drain_output, args=(proc, proc.stderr, stderr_tail), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+            deadline = start + 300
+            try:
+                # Poll so a win by another method kills the process promptly
+                while True:
+                    try:
+                        returncode = proc.wait(timeout=1)
+                        break
+                    except subprocess.TimeoutExpired:
+                        if time.time() >= deadline:
+                            raise
+                        _check_stop(stop)
+            except (subprocess.TimeoutExpired, DownloadCancelled):
+                proc.kill()
+                proc.wait()
+                raise
+            finally:
+                for reader in readers:
+                    reader.join(timeout=1)
+
+            if returncode == 0:
                 # Find downloaded files
-                video_path = None
-                info_path = None
-
-                for file in os.listdir(self.output_dir):
-                    if file.endswith(('.mp4', '.webm', '.mkv', '.avi')):
-                        video_path = os.path.join(self.output_dir, file)
-                    elif file.endswith('.info.json'):
-                        info_path = os.path.join(self.output_dir, file)
+                video_path, info_path = _find_downloaded_files(output_dir, start)
 
                 if video_path and os.path.exists(video_path):
                     self.throttler.reset_delay()
@@ -406,8 +689,7 @@ class RobustYouTubeDownloader:
                     metadata = {}
                     if info_path and os.path.exists(info_path):
                         try:
-                            with open(info_path, 'r', encoding='utf-8') as f:
-                                metadata = json.load(f)
+                            metadata = json.loads(Path(info_path).read_bytes())
                         except:
                             pass
 
@@ -418,16 +700,17 @@ class RobustYouTubeDownloader:
                         method="youtube-dl"
                     )
 
-            return DownloadResult(False, error=f"youtube-dl failed: {result.stderr}", method="youtube-dl")
+            return DownloadResult(False, error=f"youtube-dl failed: {''.join(stderr_tail)}", method="youtube-dl")
 
         except Exception as e:
             logger.warning(f"Method 3 (youtube-dl) failed: {e}")
             return DownloadResult(False, error=str(e), method="youtube-dl")
 
-    def _method_4_transcript_only(self, url: str) -> DownloadResult:
+    def _method_4_transcript_only(self, url: str, output_dir: str = None) -> DownloadResult:
         """Method 4: Transcript-only fallback using youtube-transcript-api"""
+        output_dir = output_dir or self.output_dir
         try:
-            from youtube_transcript_api import YouTubeTranscriptApi
+            YouTubeTranscriptApi = _lazy_import('youtube_transcript_api').YouTubeTranscriptApi
 
             logger.info("Attempting Method 4: Transcript-only")
 
@@ -455,11 +738,8 @@ class RobustYouTubeDownloader:
             transcript_data = transcript.fetch()
 
             # Create transcript file
-            transcript_text = "\n".join([entry['text'] for entry in transcript_data])
-            transcript_path = os.path.join(self.output_dir, f"transcript_{video_id}.txt")
-
-            with open(transcript_path, 'w', encoding='utf-8') as f:
-                f.write(transcript_text)
+            transcript_path = os.path.join(output_dir, f"transcript_{video_id}.txt")
+            self._write_transcript(transcript_path, transcript_data)
 
             # Create metadata
             metadata = {
@@ -480,53 +760,133 @@ class RobustYouTubeDownloader:
             logger.warning(f"Method 4 (transcript-only) failed: {e}")
             return DownloadResult(False, error=str(e), method="transcript_only")
 
-    def _method_5_proxy_download(self, url: str) -> DownloadResult:
+    @staticmethod
+    def _write_fully(fd: int, data) -> None:
+        """os.write until every byte of data has been written"""
+        data = memoryview(data)
+        while data:
+            data = data[os.write(fd, data):]
+
+    @classmethod
+    def _write_transcript(cls, transcript_path: str, transcript_data) -> None:
+        """Stream a transcript to disk entry by entry as UTF-8 bytes, bypassing the
+        text-mode codec and newline translation; only TRANSCRIPT_BUFFER_SIZE bytes
+        are held in memory at a time"""
+        buffer = bytearray()
+        fd = os.open(transcript_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            for i, entry in enumerate(transcript_data):
+                if i:
+                    buffer += b"\n"
+                buffer += entry['text'].encode('utf-8')
+                if len(buffer) >= cls.TRANSCRIPT_BUFFER_SIZE:
+                    cls._write_fully(fd, buffer)
+                    buffer.clear()
+            cls._write_fully(fd, buffer)
+        finally:
+            os.close(fd)
+
+    def download_transcripts_bulk(self, urls: List[str]) -> List[DownloadResult]:
+        """
+        Transcript-only download for many videos, e.g. a playlist
+
+        Fetches English transcripts for all videos in one batched
+        youtube-transcript-api call and writes them from a thread pool.
+        Videos it cannot serve fall back to the per-video transcript method,
+        which also accepts non-English transcripts.
+
+        Args:
+            urls: YouTube video URLs
+
+        Returns:
+            List of DownloadResult objects, one per URL in input order
+        """
+        video_ids = [self._extract_video_id(url) for url in urls]
+        wanted = list(dict.fromkeys(vid for vid in video_ids if vid))
+
+        transcripts = {}
+        if wanted:
+            try:
+                YouTubeTranscriptApi = _lazy_import('youtube_transcript_api').YouTubeTranscriptApi
+                if hasattr(YouTubeTranscriptApi, 'get_transcripts'):
+                    transcripts, _ = YouTubeTranscriptApi.get_transcripts(
+                        wanted, languages=['en', 'en-US', 'en-GB'], continue_after_error=True
+                    )
+            except Exception as e:
+                logger.warning(f"Bulk transcript fetch failed: {e}")
+
+        def save(url, video_id):
+            if not video_id:
+                return DownloadResult(False, error="Could not extract video ID", method="transcript_only")
+            transcript_data = transcripts.get(video_id)
+            if transcript_data is None:
+                return self._method_4_transcript_only(url)
+            try:
+                transcript_path = os.path.join(self.output_dir, f"transcript_{video_id}.txt")
+                self._write_transcript(transcript_path, transcript_data)
+            except OSError as e:
+                return DownloadResult(False, error=str(e), method="transcript_only")
+            metadata = {
+                'video_id': video_id,
+                'transcript_length': len(transcript_data),
+                'method': 'transcript_only'
+            }
+            return DownloadResult(success=True, video_path=transcript_path, metadata=metadata, method="transcript_only")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(save, urls, video_ids))
+
+    def _method_5_proxy_download(self, url: str, output_dir: str = None,
+                                 stop: Optional[threading.Event] = None) -> DownloadResult:
         """Method 5: Download through proxy service (if enabled)"""
+        output_dir = output_dir or self.output_dir
         if not self.enable_proxy:
             return DownloadResult(False, error="Proxy not enabled", method="proxy")
 
-        try:
-            logger.info("Attempting Method 5: Proxy download")
+        # This is a placeholder for proxy implementation
+        # In production, you would integrate with services like:
+        # - ProxyMesh
+        # - Bright Data
+        # - Oxylabs
+        # - ScrapingBee
+
+        # Example implementation (you need to configure with actual proxy service).
+        # Checked before anything else so an unconfigured proxy never pays for the yt-dlp import
+        proxy_config = {
+            'http': os.getenv('HTTP_PROXY'),
+            'https': os.getenv('HTTPS_PROXY')
+        }
 
-            # This is a placeholder for proxy implementation
-            # In production, you would integrate with services like:
-            # - ProxyMesh
-            # - Bright Data
-            # - Oxylabs
-            # - ScrapingBee
-
-            # Example implementation (you need to configure with actual proxy service):
-            proxy_config = {
-                'http': os.getenv('HTTP_PROXY'),
-                'https': os.getenv('HTTPS_PROXY')
-            }
+        if not any(proxy_config.values()):
+            return DownloadResult(False, error="No proxy configuration found", method="proxy")
 
-            if not any(proxy_config.values()):
-                return DownloadResult(False, error="No proxy configuration found", method="proxy")
+        try:
+            logger.info("Attempting Method 5: Proxy download")
+            start = time.time()
 
             # Use yt-dlp with proxy
-            import yt_dlp
+            yt_dlp = _lazy_import('yt_dlp')
 
-            config = self.browser_sim.get_ytdlp_config(self.output_dir)
+            config = self.browser_sim.get_ytdlp_config(output_dir)
             config['proxy'] = proxy_config.get('https') or proxy_config.get('http')
+            stall_hook = self._make_stall_hook()
+            stall_hook.reset(stop)
+            config['progress_hooks'] = [stall_hook]
 
             with yt_dlp.YoutubeDL(config) as ydl:
-                info = ydl.extract_info(url, download=False)
+                info = ydl.extract_info(url, download=True)
                 if not info:
                     return DownloadResult(False, error="Could not extract video info via proxy", method="proxy")
 
-                ydl.download([url])
-
                 # Find downloaded file
-                for file in os.listdir(self.output_dir):
-                    if file.endswith(('.mp4', '.webm', '.mkv', '.avi')):
-                        video_path = os.path.join(self.output_dir, file)
-                        return DownloadResult(
-                            success=True,
-                            video_path=video_path,
-                            metadata=info,
-                            method="proxy"
-                        )
+                video_path = _requested_filepath(info) or _find_downloaded_files(output_dir, start)[0]
+                if video_path:
+                    return DownloadResult(
+                        success=True,
+                        video_path=video_path,
+                        metadata=info,
+                        method="proxy"
+                    )
 
                 return DownloadResult(False, error="Video file not found after proxy download", method="proxy")
 
@@ -538,6 +898,11 @@ class RobustYouTubeDownloader:
         """
         Main download method with intelligent fallback strategy
 
+        The video methods are raced speculatively: up to RACE_CONCURRENCY of
+        them run at once, the first success wins and the rest are stopped
+        (and waited for) before this returns.
+        Transcript-only remains a sequential last resort.
+
         Args:
             url: YouTube video URL
             max_retries: Maximum number of retry attempts per method
@@ -551,61 +916,219 @@ class RobustYouTubeDownloader:
         if not self._is_video_accessible(url):
             return DownloadResult(False, error="Video appears to be inaccessible", method="accessibility_check")
 
-        # Define download methods in order of preference
+        return self._run_coroutine(self._download_async(url, max_retries))
+
+    def download_many(self, urls: List[str], max_retries: int = 3) -> Dict[str, DownloadResult]:
+        """
+        Download several videos, e.g. from a playlist
+
+        All accessibility checks run concurrently first (up to
+        CHECK_CONCURRENCY at once), then the accessible videos are downloaded
+        BULK_DOWNLOAD_CONCURRENCY at a time, each into its own subdirectory.
+
+        Args:
+            urls: YouTube video URLs
+            max_retries: Maximum number of retry attempts per method
+
+        Returns:
+            Dict mapping each URL to its DownloadResult
+        """
+        logger.info(f"Starting robust download for {len(urls)} videos")
+        return self._run_coroutine(self._download_many_async(list(dict.fromkeys(urls)), max_retries))
+
+    @staticmethod
+    def _run_coroutine(coro):
+        """Run a coroutine to completion from synchronous code"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # Called from inside an event loop: run it on a private loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(asyncio.run, coro).result()
+
+    async def _check_many(self, urls: List[str]) -> Dict[str, bool]:
+        """Run the oembed accessibility check for many URLs concurrently"""
+        results = {}
+        pending = []
+        for url in urls:
+            video_id = self._extract_video_id(url)
+            if not video_id:
+                results[url] = False
+                continue
+            cached = self._meta_get(video_id)
+            if cached is not None:
+                results[url] = cached
+            else:
+                pending.append((url, video_id))
+
+        if not pending:
+            return results
+
+        if not AIOHTTP_AVAILABLE:
+            # Fall back to the blocking check, fanned out over the default thread pool
+            loop = asyncio.get_running_loop()
+            checks = await asyncio.gather(
+                *(loop.run_in_executor(None, self._is_video_accessible, url) for url, _ in pending)
+            )
+            results.update(zip((url for url, _ in pending), checks))
+            return results
+
+        semaphore = asyncio.Semaphore(self.CHECK_CONCURRENCY)
+
+        async def check(session, url, video_id):
+            async with semaphore:
+                try:
+                    check_url = self._oembed_url(video_id)
+                    async with session.head(check_url, allow_redirects=True) as response:
+                        status = response.status
+                    if status == 405:
+                        async with session.get(check_url) as response:
+                            status = response.status
+                except Exception as e:
+                    logger.warning(f"Accessibility check failed for {url}: {e}")
+                    return url, True  # Assume accessible if check fails
+            accessible = status == 200
+            if accessible or status in self.INACCESSIBLE_STATUSES:
+                self._meta_put(video_id, accessible=accessible)
+            return url, accessible
+
+        async with aiohttp.ClientSession(headers=dict(self._session.headers),
+                                         timeout=aiohttp.ClientTimeout(total=10)) as session:
+            results.update(await asyncio.gather(*(check(session, url, video_id) for url, video_id in pending)))
+        return results
+
+    async def _download_many_async(self, urls: List[str], max_retries: int) -> Dict[str, DownloadResult]:
+        """Check all URLs concurrently, then download the accessible ones with bounded concurrency"""
+        accessible = await self._check_many(urls)
+        semaphore = asyncio.Semaphore(self.BULK_DOWNLOAD_CONCURRENCY)
+
+        async def run(url):
+            if not accessible.get(url):
+                return url, DownloadResult(False, error="Video appears to be inaccessible", method="accessibility_check")
+            async with semaphore:
+                video_dir = os.path.join(self.output_dir, self._extract_video_id(url))
+                return url, await self._download_async(url, max_retries, video_dir)
+
+        return dict(await asyncio.gather(*(run(url) for url in urls)))
+
+    async def _download_async(self, url: str, max_retries: int, output_dir: str = None) -> DownloadResult:
+        """Race the video download methods and fall back to transcript-only"""
+        # Video methods in order of preference; each gets its own subdirectory
+        # so concurrent runs never pick up each other's partial files
         methods = [
             self._method_1_enhanced_ytdlp,
             self._method_2_pytube,
             self._method_3_youtube_dl,
-            self._method_5_proxy_download,  # Try proxy before transcript-only
-            self._method_4_transcript_only,  # Last resort
+            self._method_5_proxy_download,
         ]
 
         # Track all errors for debugging
         all_errors = []
 
-        for method_func in methods:
-            method_name = method_func.__name__.replace('_method_', '').replace('_', ' ').title()
+        executor = ThreadPoolExecutor(max_workers=len(methods))
+        semaphore = asyncio.Semaphore(self.RACE_CONCURRENCY)
+        # Set once a method wins; the others check it from their progress callbacks
+        stop = threading.Event()
+        try:
+            pending = {
+                asyncio.create_task(self._run_with_retries(
+                    method_func, url, max_retries, all_errors, executor, semaphore, output_dir, stop
+                ))
+                for method_func in methods
+            }
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.success:
+                        stop.set()
+                        for loser in pending:
+                            loser.cancel()
+                        await asyncio.gather(*pending, return_exceptions=True)
+                        self._meta_put(self._extract_video_id(url), accessible=True)
+                        return result
 
+            # Last resort
+            result = await self._run_with_retries(
+                self._method_4_transcript_only, url, max_retries, all_errors, executor, semaphore, output_dir
+            )
+            if result.success:
+                return result
+        finally:
+            # Stop any method still running and wait for its thread, so nothing
+            # keeps writing into the method directories once this returns
+            stop.set()
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(executor.shutdown, wait=True, cancel_futures=True)
+            )
+
+        # All methods failed
+        final_error = "All download methods failed:\n" + "\n".join(all_errors)
+        logger.error(final_error)
+
+        return DownloadResult(False, error=final_error, method="all_methods_failed")
+
+    async def _run_with_retries(self, method_func, url: str, max_retries: int, all_errors: List[str],
+                                executor: ThreadPoolExecutor, semaphore: asyncio.Semaphore,
+                                output_dir: str = None, stop: threading.Event = None) -> DownloadResult:
+        """Run one download method in the executor with exponential-backoff retries"""
+        method_name = method_func.__name__.replace('_method_', '').replace('_', ' ').title()
+        method_dir = os.path.join(output_dir or self.output_dir, method_func.__name__.lstrip('_'))
+        os.makedirs(method_dir, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        result = DownloadResult(False, error=f"{method_name} not attempted", method=method_name)
+        args = (url, method_dir) if stop is None else (url, method_dir, stop)
+
+        async with semaphore:
             for attempt in range(max_retries):
+                if stop is not None and stop.is_set():
+                    break
                 try:
                     logger.info(f"Trying {method_name} (attempt {attempt + 1}/{max_retries})")
 
-                    result = method_func(url)
+                    result = await loop.run_in_executor(executor, method_func, *args)
 
                     if result.success:
                         logger.info(f"✅ Success with {method_name}!")
                         return result
-                    else:
-                        error_msg = f"{method_name} attempt {attempt + 1}: {result.error}"
-                        all_errors.append(error_msg)
-                        logger.warning(error_msg)
 
-                        # Wait before retry (exponential backoff)
-                        if attempt < max_retries - 1:
-                            wait_time = (2 ** attempt) + random.uniform(0.5, 1.5)
-                            logger.info(f"Waiting {wait_time:.1f}s before retry...")
-                            time.sleep(wait_time)
+                    error_msg = f"{method_name} attempt {attempt + 1}: {result.error}"
+                    all_errors.append(error_msg)
+                    logger.warning(error_msg)
+
+                    # Retrying cannot fix a missing tool or configuration; release the slot now
+                    if result.error in self.NON_RETRYABLE_ERRORS:
+                        break
 
                 except Exception as e:
                     error_msg = f"{method_name} attempt {attempt + 1} exception: {str(e)}"
                     all_errors.append(error_msg)
                     logger.error(error_msg)
+                    result = DownloadResult(False, error=str(e), method=method_name)
 
-                    if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) + random.uniform(0.5, 1.5)
-                        time.sleep(wait_time)
+                # Wait before retry (exponential backoff)
+                if attempt < max_retries - 1:
+                    wait_time = (2 ** attempt) + random.uniform(0.5, 1.5)
+                    logger.info(f"Waiting {wait_time:.1f}s before retrying {method_name}...")
+                    await asyncio.sleep(wait_time)
 
-        # All methods failed
-        final_error = "All download methods failed:\n" + "\n".join(all_errors)
-        logger.error(final_error)
-
-        return DownloadResult(False, error=final_error, method="all_methods_failed")
+        return result
 
     def cleanup(self):
         """Clean up temporary files"""
+        self._session.close()
+        with self._ydl_lock:
+            pooled_ydls, self._ydl_pool = self._ydl_pool, []
+        for ydl, _, _ in pooled_ydls:
+            ydl.close()
+        if self._meta_db is not None:
+            with self._meta_lock:
+                self._meta_db.close()
+            self._meta_db = None
         try:
             if os.path.exists(self.output_dir) and self.output_dir.startswith(tempfile.gettempdir()):
-                import shutil
                 shutil.rmtree(self.output_dir)
                 logger.info(f"Cleaned up temporary directory: {self.output_dir}")
         except Exception as e:
@@ -645,10 +1168,19 @@ def test_download_methods(test_url: str = "https://www.youtube.com/watch?v=dQw4w
         ("Transcript-only", downloader._method_4_transcript_only),
     ]
 
-    for name, method in methods:
+    # Run every method at once, each in its own directory so their files never mix;
+    # results are reported in the usual order once all have finished
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            name: executor.submit(method, test_url,
+                                  tempfile.mkdtemp(prefix=f"test_{name.replace(' ', '_')}_", dir=downloader.output_dir))
+            for name, method in methods
+        }
+
+    for name, future in futures.items():
         print(f"\n🔍 Testing {name}...")
         try:
-            result = method(test_url)
+            result = future.result()
             if result.success:
                 print(f"✅ {name}: SUCCESS")
                 print(f"   File: {result.video_path}")
@@ -5,160 +5,460 @@ Quick fix for the slide extractor download issues
 """
 
 import os
+import re
 import sys
 import shutil
+import textwrap
+import time
 import logging
-from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-def backup_files():
-    """Create backup of important files"""
-    backup_dir = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    os.makedirs(backup_dir, exist_ok=True)
-    
-    files_to_backup = ["slide_extractor.py", "enhanced_slide_extractor.py", "requirements.txt"]
-    
-    for file in files_to_backup:
-        if os.path.exists(file):
-            shutil.copy2(file, os.path.join(backup_dir, file))
-            logger.info(f"Backed up {file}")
-    
-    logger.info(f"Backup created in {backup_dir}")
-    return backup_dir
+# Splits a requirement line at the end of the distribution name
+_REQ_NAME_SPLIT = re.compile(r'[<>=!~;\[\s]')
 
-def update_requirements():
-    """Add new dependencies to requirements.txt"""
-    logger.info("Updating requirements.txt...")
+def _requirement_name(line):
+    """Normalized distribution name of a requirements.txt line"""
+    return _REQ_NAME_SPLIT.split(line.strip(), 1)[0].lower().replace('_', '-')
+
+# Buffer size for copies the kernel cannot do itself; shutil's POSIX default is 64 KiB
+_COPY_BUFSIZE = 1 << 20
+
+def _copy_file(src, dst):
+    """Copy src to dst with its metadata, in-kernel via copy_file_range where supported"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        try:
+            # Lets copy-on-write filesystems reflink instead of copying data
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if not copied:
+                    break
+                remaining -= copied
+        except (AttributeError, OSError):
+            # Not Linux, or the filesystem pair is unsupported; continue from the current offsets
+            shutil.copyfileobj(fsrc, fdst, _COPY_BUFSIZE)
+    shutil.copystat(src, dst)
+
+# Source of the generated enhanced_download_patch.py
+_PATCH_TEMPLATE = '''
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from urllib.parse import urlparse
+
+try:
+    from yt_dlp import YoutubeDL
+    YT_DLP_AVAILABLE = True
+except ImportError:
+    YT_DLP_AVAILABLE = False
+
+# Finished downloads are kept here, indexed by sha1(video_url), so repeat URLs skip yt-dlp
+_CACHE_DIR = os.path.expanduser("~/.cache/slide_extractor/videos")
+# Cached videos older than this, or beyond this total size (oldest first), are evicted
+_CACHE_MAX_AGE = 7 * 24 * 3600
+_CACHE_MAX_BYTES = 5 * 1024 ** 3
+# Per-strategy {name: [successes, failures]}, used to try the most reliable strategy first
+_STATS_PATH = os.path.expanduser("~/.cache/slide_extractor/strategy_stats.json")
+
+
+def _cache_db():
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    db = sqlite3.connect(os.path.join(_CACHE_DIR, "index.sqlite"))
+    db.execute("CREATE TABLE IF NOT EXISTS v (key TEXT PRIMARY KEY, path TEXT, strategy TEXT, ts INT, size INT)")
+    return db
+
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, copying instead when linking is not possible"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _cache_lookup(url):
+    """Return the cached file for url if it is still intact, else None"""
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    try:
+        with closing(_cache_db()) as db:
+            row = db.execute("SELECT path, size FROM v WHERE key = ?", (key,)).fetchone()
+    except sqlite3.Error:
+        return None
+    if row and os.path.exists(row[0]) and os.path.getsize(row[0]) == row[1]:
+        return row[0]
+    return None
+
+
+def _cache_evict(db):
+    """Drop entries past _CACHE_MAX_AGE, then the oldest until the cache fits _CACHE_MAX_BYTES"""
+    rows = db.execute("SELECT key, path, ts, size FROM v ORDER BY ts DESC").fetchall()
+    cutoff = time.time() - _CACHE_MAX_AGE
+    total = 0
+    evicted = []
+    for key, path, ts, size in rows:
+        total += size or 0
+        if ts < cutoff or total > _CACHE_MAX_BYTES:
+            evicted.append((key, path))
+    for key, path in evicted:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    db.executemany("DELETE FROM v WHERE key = ?", [(key,) for key, _ in evicted])
+
+
+def _cache_store(url, path, strategy):
+    """Keep a downloaded file in the cache along with the strategy that fetched it"""
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    cached = os.path.join(_CACHE_DIR, key + os.path.splitext(path)[1])
+    try:
+        with closing(_cache_db()) as db, db:
+            _link_or_copy(path, cached)
+            db.execute("INSERT OR REPLACE INTO v VALUES (?, ?, ?, ?, ?)",
+                       (key, cached, strategy, int(time.time()), os.path.getsize(cached)))
+            _cache_evict(db)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def _load_strategy_stats():
+    try:
+        with open(_STATS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_strategy_stats(stats):
+    """Write the stats atomically (write-then-rename) so concurrent runs never read a torn file"""
+    try:
+        os.makedirs(os.path.dirname(_STATS_PATH), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(_STATS_PATH), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, _STATS_PATH)
+    except OSError:
+        pass
+
+
+def _wilson_lower_bound(successes, failures, z=1.96):
+    """Lower bound of the success rate's confidence interval; one lucky success does not pin a strategy"""
+    n = successes + failures
+    if n == 0:
+        return 0.0
+    p = successes / n
+    return (p + z * z / (2 * n) - z * math.sqrt((p * (1 - p) + z * z / (4 * n)) / n)) / (1 + z * z / n)
+
+
+# Shared Netscape cookie file for the cookie-based strategy, rewritten once a week
+_COOKIE_PATH = os.path.join(tempfile.gettempdir(), "slide_extractor_yt_cookies.txt")
+_COOKIE_MAX_AGE = 7 * 24 * 3600
+_COOKIES = """# Netscape HTTP Cookie File
+.youtube.com	TRUE	/	FALSE	1735689600	CONSENT	YES+cb.20210328-17-p0.en+FX+667
+.youtube.com	TRUE	/	FALSE	1735689600	VISITOR_INFO1_LIVE	Gtm5d3eFQONDhlQo
+.youtube.com	TRUE	/	FALSE	1735689600	YSC	H3C4rqaEhGA
+"""
+
+
+def _ensure_cookies_file():
+    """Return _COOKIE_PATH, (re)writing it only when missing or older than _COOKIE_MAX_AGE"""
+    try:
+        fresh = os.path.getmtime(_COOKIE_PATH) >= time.time() - _COOKIE_MAX_AGE
+    except OSError:
+        fresh = False
+    if not fresh:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(_COOKIE_PATH), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(_COOKIES)
+        os.replace(tmp_path, _COOKIE_PATH)
+    return _COOKIE_PATH
+
+
+# Hosts the tuned strategies are meant for; anything else gets a single generic attempt
+_YOUTUBE_HOSTS = ("youtube.com", "youtu.be", "youtube-nocookie.com")
+
+# yt-dlp errors that mean YouTube is throttling us rather than the strategy being broken
+_RATE_LIMITED = re.compile(r"HTTP Error 429|too many requests|confirm you're not a bot", re.I)
+
+
+class _ErrorLog:
+    """yt-dlp logger that keeps error messages and drops everything else"""
     
-    new_deps = [
-        "selenium>=4.15.0",
-        "pytube>=15.0.0", 
-        "webdriver-manager>=4.0.0"
-    ]
+    def __init__(self):
+        self.errors = []
     
-    # Read existing requirements
-    existing = []
-    if os.path.exists("requirements.txt"):
-        with open("requirements.txt", "r") as f:
-            existing = f.read().splitlines()
+    def debug(self, msg):
+        pass
     
-    # Add new dependencies
-    updated = False
-    for dep in new_deps:
-        dep_name = dep.split(">=")[0]
-        if not any(dep_name in req for req in existing):
-            existing.append(dep)
-            updated = True
-            logger.info(f"Added {dep}")
+    info = warning = debug
     
-    if updated:
-        with open("requirements.txt", "w") as f:
-            f.write("\n".join(existing) + "\n")
-        logger.info("Requirements updated")
-    else:
-        logger.info("Requirements already up to date")
+    def error(self, msg):
+        self.errors.append(msg)
+
+
+class _StrategyCancelled(Exception):
+    """Raised from a progress hook to unwind a strategy that lost the race"""
+
+
+def _run_coroutine(coro):
+    """Run a coroutine to completion, on a private loop in a worker thread if one is already running"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        return runner.submit(asyncio.run, coro).result()
+
 
-def create_enhanced_download_patch():
-    """Create a patch file for enhanced download functionality"""
-    logger.info("Creating enhanced download patch...")
-    
-    patch_content = '''
 def download_video_enhanced(self, video_url, output_path, callback=None):
-    """Enhanced video download with multiple fallback strategies"""
-    import subprocess
-    import tempfile
-    import random
-    import time
-    import os
-    
-    def create_cookies_file():
-        cookies_content = """# Netscape HTTP Cookie File
-.youtube.com	TRUE	/	FALSE	1735689600	CONSENT	YES+cb.20210328-17-p0.en+FX+667
-.youtube.com	TRUE	/	FALSE	1735689600	VISITOR_INFO1_LIVE	Gtm5d3eFQONDhlQo
-.youtube.com	TRUE	/	FALSE	1735689600	YSC	H3C4rqaEhGA
-"""
-        temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-        temp_file.write(cookies_content)
-        temp_file.close()
-        return temp_file.name
+    """
+    Enhanced video download with multiple fallback strategies
+
+    Strategies are raced as concurrent in-process yt-dlp downloads with
+    staggered starts: each one starts once the previous strategy has failed
+    or STAGGER seconds have passed; the first to produce a real file wins and
+    the rest are stopped. URLs downloaded before are served from the local
+    cache without yt-dlp.
+    """
+    if not YT_DLP_AVAILABLE:
+        self.logger.error("yt-dlp is not installed")
+        return False
+    
+    STAGGER = 10  # Seconds before hedging with the next strategy
+    TIMEOUT = 300
+    GRACE = 5  # Seconds a timed-out download gets to unwind before its files are removed
+    
+    cached = _cache_lookup(video_url)
+    if cached:
+        _link_or_copy(cached, output_path)
+        self.logger.info(f"Using cached download of {video_url}")
+        if callback:
+            callback("Download served from cache")
+        return True
+    
+    # Options shared by every strategy (the CLI's --no-check-certificates --ignore-errors)
+    common_options = {
+        "quiet": True,
+        "no_warnings": True,
+        "nocheckcertificate": True,
+        "ignoreerrors": True,
+    }
     
-    # Enhanced strategies based on 2024 research
+    # Enhanced strategies based on 2024 research, expressed as yt-dlp options so
+    # they run in this process instead of each paying for a fresh interpreter
     strategies = [
         {
             "name": "Cookie-based Authentication",
-            "args": [
-                "yt-dlp", "-f", "best[height<=720][ext=mp4]/best[height<=480]/worst[ext=mp4]",
-                "-o", output_path, "--cookies", "{cookies_file}",
-                "--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "--extractor-args", "youtube:player_client=web,mweb;skip=dash,hls",
-                "--sleep-interval", "2", "--no-check-certificates", "--ignore-errors", video_url
-            ]
+            "options": lambda cookies_file, output: {
+                "format": "best[height<=720][ext=mp4]/best[height<=480]/worst[ext=mp4]",
+                "outtmpl": output,
+                "cookiefile": cookies_file,
+                "http_headers": {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
+                "extractor_args": {"youtube": {"player_client": ["web", "mweb"], "skip": ["dash", "hls"]}},
+                "sleep_interval": 2,
+            }
         },
         {
             "name": "Android Client",
-            "args": [
-                "yt-dlp", "-f", "best[height<=720][ext=mp4]/best[height<=480]/worst",
-                "-o", output_path, "--user-agent", "com.google.android.youtube/19.09.37",
-                "--extractor-args", "youtube:player_client=android",
-                "--add-header", "X-YouTube-Client-Name:3",
-                "--add-header", "X-YouTube-Client-Version:19.09.37",
-                "--sleep-interval", "1", "--no-check-certificates", "--ignore-errors", video_url
-            ]
+            "options": lambda cookies_file, output: {
+                "format": "best[height<=720][ext=mp4]/best[height<=480]/worst",
+                "outtmpl": output,
+                "http_headers": {
+                    "User-Agent": "com.google.android.youtube/19.09.37",
+                    "X-YouTube-Client-Name": "3",
+                    "X-YouTube-Client-Version": "19.09.37",
+                },
+                "extractor_args": {"youtube": {"player_client": ["android"]}},
+                "sleep_interval": 1,
+            }
         },
         {
             "name": "iOS Client",
-            "args": [
-                "yt-dlp", "-f", "best[height<=480][ext=mp4]/worst",
-                "-o", output_path, "--user-agent", "com.google.ios.youtube/19.09.3",
-                "--extractor-args", "youtube:player_client=ios",
-                "--add-header", "X-YouTube-Client-Name:5",
-                "--add-header", "X-YouTube-Client-Version:19.09.3",
-                "--sleep-interval", "2", "--no-check-certificates", "--ignore-errors", video_url
-            ]
+            "options": lambda cookies_file, output: {
+                "format": "best[height<=480][ext=mp4]/worst",
+                "outtmpl": output,
+                "http_headers": {
+                    "User-Agent": "com.google.ios.youtube/19.09.3",
+                    "X-YouTube-Client-Name": "5",
+                    "X-YouTube-Client-Version": "19.09.3",
+                },
+                "extractor_args": {"youtube": {"player_client": ["ios"]}},
+                "sleep_interval": 2,
+            }
         }
     ]
     
-    cookies_file = create_cookies_file()
+    # The strategies above only make sense for YouTube
+    host = (urlparse(video_url).hostname or "").lower()
+    if not any(host == h or host.endswith("." + h) for h in _YOUTUBE_HOSTS):
+        strategies = [
+            {
+                "name": "Generic",
+                "options": lambda cookies_file, output: {
+                    "format": "best[height<=720]/best",
+                    "outtmpl": output,
+                }
+            }
+        ]
     
-    try:
-        for i, strategy in enumerate(strategies, 1):
-            try:
-                if callback:
-                    callback(f"Trying enhanced method {i}/{len(strategies)}: {strategy['name']}")
-                
-                self.logger.info(f"Attempting download with {strategy['name']}")
-                
-                # Clean up previous attempts
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-                
-                # Prepare command
-                command = strategy["args"]
-                if "{cookies_file}" in command:
-                    command = [arg.replace("{cookies_file}", cookies_file) for arg in command]
-                
-                # Execute command
-                result = subprocess.run(command, capture_output=True, text=True, timeout=300)
-                
-                if result.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 1024:
-                    self.logger.info(f"Success with {strategy['name']}")
-                    if callback:
-                        callback(f"Download successful with {strategy['name']}")
-                    return True
-                else:
-                    self.logger.warning(f"Failed: {strategy['name']}")
+    # Lead with the historically most reliable strategy; ties keep the default order
+    stats = _load_strategy_stats()
+    
+    def reliability(strategy):
+        successes, failures = stats.get(strategy["name"], (0, 0))
+        return (-_wilson_lower_bound(successes, failures), failures)
+    
+    strategies.sort(key=reliability)
+    
+    def record(strategy, success):
+        counts = stats.setdefault(strategy["name"], [0, 0])
+        counts[0 if success else 1] += 1
+        _save_strategy_stats(stats)
+    
+    # Each strategy downloads to its own file so racing downloads never clobber each other
+    base, ext = os.path.splitext(output_path)
+    part_paths = [f"{base}.strategy{i}{ext}" for i in range(1, len(strategies) + 1)]
+    executor = ThreadPoolExecutor(max_workers=len(strategies))
+    
+    async def run_strategy(i, strategy, part_path, previous, events):
+        started, failed = events
+        log = _ErrorLog()
+        try:
+            # Hedge: start once the previous strategy failed or ran for STAGGER seconds
+            if previous is not None:
+                await previous[0].wait()
+                try:
+                    await asyncio.wait_for(previous[1].wait(), timeout=STAGGER)
+                except asyncio.TimeoutError:
+                    pass
+            started.set()
+            
+            if callback:
+                callback(f"Trying enhanced method {i}/{len(strategies)}: {strategy['name']}")
+            self.logger.info(f"Attempting download with {strategy['name']}")
+            
+            # Clean up previous attempts
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            
+            # A losing download thread cannot be killed; it is unwound at its next progress hook
+            stop = threading.Event()
+            
+            reported = [-1]
+            
+            def on_progress(progress):
+                if stop.is_set():
+                    raise _StrategyCancelled(strategy["name"])
+                # Stream progress to the callback as it happens, once per whole percent
+                total = progress.get("total_bytes") or progress.get("total_bytes_estimate")
+                if callback and progress.get("status") == "downloading" and total:
+                    percent = int(progress.get("downloaded_bytes", 0) * 100 / total)
+                    if percent != reported[0]:
+                        reported[0] = percent
+                        callback(f"[download] {strategy['name']}: {percent}%")
+            
+            options = dict(common_options, **strategy["options"](cookies_file, part_path))
+            options["progress_hooks"] = [on_progress]
+            options["logger"] = log
             
-            except subprocess.TimeoutExpired:
+            def download():
+                try:
+                    with YoutubeDL(options) as ydl:
+                        return ydl.download([video_url])
+                except _StrategyCancelled:
+                    return None
+            
+            # Execute download; shielded so a timeout leaves the future awaitable for the grace period
+            download_future = asyncio.get_running_loop().run_in_executor(executor, download)
+            try:
+                returncode = await asyncio.wait_for(asyncio.shield(download_future), timeout=TIMEOUT)
+            except asyncio.TimeoutError:
                 self.logger.warning(f"{strategy['name']} timed out")
-                continue
-            except Exception as e:
-                self.logger.warning(f"{strategy['name']} error: {str(e)[:100]}")
-                continue
+                record(strategy, False)
+                # Stop the download, let it close its files, then drop the partial output
+                stop.set()
+                await asyncio.wait([download_future], timeout=GRACE)
+                for path in (part_path, f"{part_path}.part"):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                return None
+            except asyncio.CancelledError:
+                # A faster strategy won: stop this download and give it the same grace
+                # period to close its files before the caller removes them
+                stop.set()
+                await asyncio.wait([download_future], timeout=GRACE)
+                raise
+            finally:
+                # Timed out or cancelled by a faster strategy
+                stop.set()
             
-            # Progressive delay
-            time.sleep(random.uniform(1, 3))
+            if returncode == 0 and os.path.exists(part_path) and os.path.getsize(part_path) > 1024:
+                self.logger.info(f"Success with {strategy['name']}")
+                record(strategy, True)
+                if callback:
+                    callback(f"Download successful with {strategy['name']}")
+                return part_path
+            self.logger.warning(f"Failed: {strategy['name']}")
+            record(strategy, False)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warning(f"{strategy['name']} error: {str(e)[:100]}")
+            log.error(str(e))
+        if _RATE_LIMITED.search("\\n".join(log.errors)):
+            # Back off before releasing the next strategy, but only when rate-limited
+            await asyncio.sleep(random.uniform(2, 5))
+        failed.set()
+        return None
+    
+    async def race():
+        # (started, failed) events per strategy
+        events = [(asyncio.Event(), asyncio.Event()) for _ in strategies]
+        tasks = [
+            asyncio.create_task(run_strategy(
+                i, strategy, part_paths[i - 1], events[i - 2] if i > 1 else None, events[i - 1]
+            ))
+            for i, strategy in enumerate(strategies, 1)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                winner = await next_done
+                if winner:
+                    return winner
+            return None
+        finally:
+            # Cancel the losers; their downloads stop at the next progress hook
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    cookies_file = _ensure_cookies_file()
+    
+    try:
+        winner = _run_coroutine(race())
+        if winner:
+            os.replace(winner, output_path)
+            _cache_store(video_url, output_path, strategies[part_paths.index(winner)]["name"])
+            return True
         
         # All strategies failed
         error_msg = "All enhanced download methods failed. Video may be restricted."
@@ -168,23 +468,17 @@ def download_video_enhanced(self, video_url, output_path, callback=None):
         return False
         
     finally:
-        # Cleanup cookies file
-        try:
-            os.unlink(cookies_file)
-        except:
-            pass
+        executor.shutdown(wait=False)
+        # Cleanup losing downloads, including yt-dlp's .part files
+        for path in part_paths + [f"{path}.part" for path in part_paths]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
 '''
-    
-    with open("enhanced_download_patch.py", "w", encoding='utf-8') as f:
-        f.write(patch_content)
-    
-    logger.info("Enhanced download patch created: enhanced_download_patch.py")
 
-def create_test_script():
-    """Create a simple test script"""
-    logger.info("Creating test script...")
-    
-    test_content = '''#!/usr/bin/env python3
+# Source of the generated test_enhanced_downloader.py
+_TEST_TEMPLATE = '''#!/usr/bin/env python3
 """Test script for enhanced downloader"""
 
 import os
@@ -230,9 +524,81 @@ def test_enhanced_download():
 if __name__ == "__main__":
     test_enhanced_download()
 '''
+
+def backup_files():
+    """Create backup of important files"""
+    # The PID keeps two runs started within the same second apart
+    backup_dir = f"backup_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    os.makedirs(backup_dir, exist_ok=True)
     
-    with open("test_enhanced_downloader.py", "w", encoding='utf-8') as f:
-        f.write(test_content)
+    files_to_backup = {"slide_extractor.py", "enhanced_slide_extractor.py", "requirements.txt"}
+    # One directory scan instead of a stat per file; also skips directories with those names
+    with os.scandir('.') as entries:
+        present = [entry.name for entry in entries if entry.name in files_to_backup and entry.is_file()]
+    
+    def backup(file):
+        # Deliberately a copy, not os.link: update_requirements appends to requirements.txt in
+        # place right after this, and a hardlinked backup would share those writes
+        _copy_file(file, os.path.join(backup_dir, file))
+        return file
+    
+    # Copy concurrently
+    with ThreadPoolExecutor(max_workers=max(len(present), 1)) as executor:
+        for file in executor.map(backup, present):
+            logger.info(f"Backed up {file}")
+    
+    logger.info(f"Backup created in {backup_dir}")
+    return backup_dir
+
+def update_requirements():
+    """Add new dependencies to requirements.txt"""
+    logger.info("Updating requirements.txt...")
+    
+    new_deps = [
+        "selenium>=4.15.0",
+        "pytube>=15.0.0", 
+        "webdriver-manager>=4.0.0"
+    ]
+    
+    # Read existing requirements
+    text = ""
+    if os.path.exists("requirements.txt"):
+        with open("requirements.txt", "r") as f:
+            text = f.read()
+    
+    # Names already required; exact name match, so "requests" no longer matches "requests-toolbelt"
+    have = {_requirement_name(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith('#')}
+    
+    # Add new dependencies
+    to_add = []
+    for dep in new_deps:
+        dep_name = _requirement_name(dep)
+        if dep_name not in have:
+            to_add.append(dep)
+            have.add(dep_name)
+            logger.info(f"Added {dep}")
+    
+    if to_add:
+        # Only additions ever happen, so append the new lines instead of rewriting the file
+        with open("requirements.txt", "a") as f:
+            f.write(("\n" if text and not text.endswith("\n") else "") + "\n".join(to_add) + "\n")
+        logger.info("Requirements updated")
+    else:
+        logger.info("Requirements already up to date")
+
+def create_enhanced_download_patch():
+    """Create a patch file for enhanced download functionality"""
+    logger.info("Creating enhanced download patch...")
+    
+    Path("enhanced_download_patch.py").write_text(_PATCH_TEMPLATE, encoding='utf-8')
+    
+    logger.info("Enhanced download patch created: enhanced_download_patch.py")
+
+def create_test_script():
+    """Create a simple test script"""
+    logger.info("Creating test script...")
+    
+    Path("test_enhanced_downloader.py").write_text(_TEST_TEMPLATE, encoding='utf-8')
     
     logger.info("Test script created: test_enhanced_downloader.py")
 
@@ -254,21 +620,28 @@ def main():
         # Step 4: Create test script
         create_test_script()
         
-        # Summary
-        print("\n" + "=" * 55)
-        print("🎉 Integration Complete!")
-        print("=" * 55)
-        print("📋 What was done:")
-        print("  ✅ Created backup of existing files")
-        print("  ✅ Updated requirements.txt with new dependencies")
-        print("  ✅ Created enhanced download patch")
-        print("  ✅ Created test script")
-        print("\n📋 Next steps:")
-        print("  1. Install new dependencies: pip install -r requirements.txt")
-        print("  2. Test the enhanced downloader: python test_enhanced_downloader.py")
-        print("  3. Manually integrate the patch into your slide extractor")
-        print(f"\n📁 Backup available in: {backup_dir}")
-        print("\n🎯 Your slide extractor will have much better download success rates!")
+        # Summary, written in one go
+        rule = "=" * 55
+        sys.stdout.write(textwrap.dedent(f"""
+            {rule}
+            🎉 Integration Complete!
+            {rule}
+            📋 What was done:
+              ✅ Created backup of existing files
+              ✅ Updated requirements.txt with new dependencies
+              ✅ Created enhanced download patch
+              ✅ Created test script
+
+            📋 Next steps:
+              1. Install new dependencies: pip install -r requirements.txt
+              2. Test the enhanced downloader: python test_enhanced_downloader.py
+              3. Manually integrate the patch into your slide extractor
+
+            📁 Backup available in: {backup_dir}
+
+            🎯 Your slide extractor will have much better download success rates!
+        """))
+        sys.stdout.flush()
         
         return True
         
@@ -1,48 +1,95 @@
 import os
 import json
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import re
 import sys
-import importlib.util
+import copy
+import bisect
+import hashlib
+import queue
+import sqlite3
+import functools
+import random
+import threading
+import time
+from collections import defaultdict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 
 # Try to import Google Generative AI
 try:
-    # Try different import methods for Google Generative AI
-    try:
-        import google.generativeai as genai
-        GENAI_AVAILABLE = True
-        logging.info("Successfully imported Google Generative AI using standard import")
-    except ImportError:
-        # Try alternative import method
-
-        # Try to find the google.generativeai package
-        spec = importlib.util.find_spec("google.generativeai")
-        if spec is not None:
-            # If found, try to import it directly
-            genai_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(genai_module)
-            genai = genai_module
-            GENAI_AVAILABLE = True
-            logging.info("Successfully imported Google Generative AI using importlib")
-        else:
-            raise ImportError("Could not find google.generativeai package")
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+    logging.info("Successfully imported Google Generative AI")
 except Exception as e:
+    # Not just ImportError: a broken install can fail with other errors on import
     logging.warning(f"Google Generative AI not available. Slide description generation will be disabled. Error: {str(e)}")
-
-    # Try to get more information about the google-generativeai package
-    try:
-        import pkg_resources
-        try:
-            dist = pkg_resources.get_distribution("google-generativeai")
-            logging.info(f"Google Generative AI package found: {dist}")
-            logging.info(f"Google Generative AI location: {dist.location}")
-        except pkg_resources.DistributionNotFound:
-            logging.warning("Google Generative AI package not found using pkg_resources")
-    except Exception as diagnostic_error:
-        logging.warning(f"Error during diagnostics: {str(diagnostic_error)}")
-
+    genai = None
     GENAI_AVAILABLE = False
 
+# Timestamp formats accepted by convert_timestamp_to_seconds
+_HMS_RE = re.compile(r'(\d+):(\d+):(\d+)(?:\.(\d+))?')
+_MS_RE = re.compile(r'(\d+):(\d+)(?:\.(\d+))?')
+_NUM_RE = re.compile(r'\d+\.?\d*')
+
+# JSON wrapped in a ```json fence, as Gemini often returns it
+_JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+
+# Gemini errors meaning the key is being rate limited or is out of quota
+_RATE_LIMITED_RE = re.compile(r'\b429\b|RESOURCE_EXHAUSTED|rate limit|quota', re.IGNORECASE)
+
+# Generation config asking Gemini for a bare JSON response
+_JSON_RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
+# Prompt for a single slide's description, split around the slide text and transcription
+_SLIDE_PROMPT_PREFIX = """
+You are an expert educational content analyzer specializing in extracting meaningful information from lecture slides and transcriptions. Your task is to analyze the following slide content and transcription, then provide a structured analysis.
+
+IMPORTANT CONTEXT:
+- This is from an educational lecture slide
+- The content may include text that was poorly extracted by OCR
+- If the content appears to be gibberish or unclear, focus on any recognizable patterns, formulas, or diagrams that might be present
+- The transcription (if available) provides spoken context for the slide
+
+ANALYSIS INSTRUCTIONS:
+1. First, determine if the slide content is readable or mostly gibberish
+2. If readable, extract the key information
+3. If mostly unreadable, focus on any recognizable patterns, mathematical symbols, or diagrams
+4. Use the transcription to provide context for unclear content
+5. For mathematical content, pay special attention to equations, variables, and formulas
+
+PROVIDE THE FOLLOWING:
+1. A concise title (max 10 words) that clearly identifies the main topic
+2. A brief description (max 50 words) summarizing the key points
+3. Main topic and subtopics (comma-separated list)
+4. Key concepts covered (comma-separated list)
+5. Important formulas or definitions (if any)
+6. Complexity level (Basic, Intermediate, Advanced)
+
+Format the response as JSON with these fields:
+{
+  "title": "Concise title",
+  "description": "Brief description",
+  "topics": ["Main topic 1", "Main topic 2"],
+  "subtopics": ["Subtopic 1", "Subtopic 2"],
+  "key_concepts": ["Concept 1", "Concept 2"],
+  "formulas": ["Formula 1", "Formula 2"],
+  "complexity": "Basic/Intermediate/Advanced"
+}
+
+IMPORTANT:
+- If the content appears to be mathematical, focus on extracting any equations or formulas
+- If the content appears to be code, preserve the syntax and structure
+- If the content is mostly unreadable, use the transcription to infer the topic
+- Always return valid JSON format
+- If you're unsure about the content, make your best educated guess based on context
+
+Slide Content:
+"""
+_SLIDE_PROMPT_SUFFIX = "\n"
+
 # Define timestamp conversion utility
 def convert_timestamp_to_seconds(timestamp):
     """Convert various timestamp formats to seconds
@@ -62,65 +109,234 @@ def convert_timestamp_to_seconds(timestamp):
 
     # If it's a string, try to convert
     if isinstance(timestamp, str):
-        # Remove any whitespace
-        timestamp = timestamp.strip()
+        return _parse_timestamp_string(timestamp)
+
+    # If all else fails, return 0
+    logging.warning(f"Could not parse timestamp: {timestamp}, using 0 instead")
+    return 0.0
+
+def convert_timestamps_to_seconds(timestamps):
+    """Convert a list of timestamps to seconds in one pass
+
+    Bulk form of convert_timestamp_to_seconds: plain numbers, by far the most common
+    segment timestamps, are converted inline and only other values go through it.
 
-        # Try direct conversion to float first
+    Args:
+        timestamps: List of timestamps in the formats convert_timestamp_to_seconds accepts
+
+    Returns:
+        List of float values in seconds
+    """
+    return [
+        float(timestamp) if type(timestamp) in (float, int) else convert_timestamp_to_seconds(timestamp)
+        for timestamp in timestamps
+    ]
+
+@functools.lru_cache(maxsize=8192)
+def _parse_timestamp_string(timestamp):
+    """Parse a string timestamp to seconds; cached since transcripts repeat the same strings"""
+    # Remove any whitespace
+    timestamp = timestamp.strip()
+
+    # Try direct conversion to float first
+    try:
+        return float(timestamp)
+    except ValueError:
+        pass
+
+    # Try HH:MM:SS format
+    match = _HMS_RE.match(timestamp)
+    if match:
+        hours, minutes, seconds, ms = match.groups()
+        total_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        if ms:
+            total_seconds += float(f"0.{ms}")
+        return float(total_seconds)
+
+    # Try MM:SS format
+    match = _MS_RE.match(timestamp)
+    if match:
+        minutes, seconds, ms = match.groups()
+        total_seconds = int(minutes) * 60 + int(seconds)
+        if ms:
+            total_seconds += float(f"0.{ms}")
+        return float(total_seconds)
+
+    # Try extracting any numbers as a last resort
+    numbers = _NUM_RE.findall(timestamp)
+    if numbers:
         try:
-            return float(timestamp)
+            return float(numbers[0])
         except ValueError:
             pass
 
-        # Try HH:MM:SS format
-        time_pattern = r'(\d+):(\d+):(\d+)(?:\.(\d+))?'
-        match = re.match(time_pattern, timestamp)
-        if match:
-            hours, minutes, seconds, ms = match.groups()
-            total_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-            if ms:
-                total_seconds += float(f"0.{ms}")
-            return float(total_seconds)
-
-        # Try MM:SS format
-        time_pattern = r'(\d+):(\d+)(?:\.(\d+))?'
-        match = re.match(time_pattern, timestamp)
-        if match:
-            minutes, seconds, ms = match.groups()
-            total_seconds = int(minutes) * 60 + int(seconds)
-            if ms:
-                total_seconds += float(f"0.{ms}")
-            return float(total_seconds)
-
-        # Try extracting any numbers as a last resort
-        numbers = re.findall(r'\d+\.?\d*', timestamp)
-        if numbers:
-            try:
-                return float(numbers[0])
-            except ValueError:
-                pass
-
     # If all else fails, return 0
     logging.warning(f"Could not parse timestamp: {timestamp}, using 0 instead")
     return 0.0
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("slide_description.log"),
-        logging.StreamHandler()
-    ]
-)
+# Character budgets for the text sent to Gemini; longer input mostly adds latency and cost
+MAX_SLIDE_CONTENT_CHARS = 6000
+MAX_TRANSCRIPTION_CHARS = 1500
+MAX_CONTEXT_CHARS = 500
+MAX_SUMMARY_TRANSCRIPT_CHARS = 2000
+
+def _clip(text, limit):
+    """Shorten text to about limit characters by cutting out its middle"""
+    if len(text) <= limit:
+        return text
+    return text[:limit // 2] + " …[truncated]… " + text[-(limit // 2):]
+
+def _fallback_description(filename, timestamp, description):
+    """Placeholder description for a slide Gemini could not describe"""
+    return {
+        "title": "Slide " + filename,
+        "description": description,
+        "topics": [],
+        "subtopics": [],
+        "key_concepts": [],
+        "complexity": "Intermediate",
+        "timestamp": timestamp,
+        "filename": filename
+    }
+
+def _fallback_summary(summary):
+    """Placeholder content summary when Gemini's reply has no usable JSON"""
+    return {
+        "title": "Content Summary",
+        "summary": summary,
+        "learning_objectives": [],
+        "prerequisites": [],
+        "difficulty": "Intermediate"
+    }
+
+def _as_list(value):
+    """Normalize a topics field, which Gemini may return as a comma-separated string"""
+    if isinstance(value, str):
+        return [t.strip() for t in value.split(',')]
+    return value or []
+
+class SegmentIndex:
+    """Transcription segments sorted by start time for fast lookups around a timestamp"""
+
+    # Seconds before and after a slide timestamp whose segments count as context
+    CONTEXT_WINDOW = 5
+    # Slack on the bisect lower bound: before - max_length can round above the start
+    # of a segment that ends exactly at before; extra candidates are filtered below
+    BOUND_EPSILON = 1e-6
+
+    def __init__(self, segments):
+        """Parse every segment's timestamps once and sort the segments by start
+
+        Args:
+            segments: List of transcription segments with start, end and text
+        """
+        starts = convert_timestamps_to_seconds([segment.get('start', 0) for segment in segments])
+        ends = convert_timestamps_to_seconds([segment.get('end', 0) for segment in segments])
+        order = sorted(range(len(segments)), key=starts.__getitem__)
+        self.starts = [starts[i] for i in order]
+        self.ends = [ends[i] for i in order]
+        self.segments = [segments[i] for i in order]
+        # Longest segment; bounds how far before a timestamp an overlapping segment can start
+        self.max_length = max(map(float.__sub__, ends, starts), default=0.0)
+
+    def lookup(self, timestamp):
+        """Find the segments spoken during and around a timestamp
+
+        Args:
+            timestamp: Slide timestamp in seconds
+
+        Returns:
+            Tuple of (direct segments, context segments), each ordered by start time
+        """
+        before = timestamp - self.CONTEXT_WINDOW
+        after = timestamp + self.CONTEXT_WINDOW
+        # Only segments starting in [lo, hi) can overlap or neighbour the timestamp;
+        # those from mid on start after it
+        lo = bisect.bisect_left(self.starts, before - max(self.max_length, 0.0) - self.BOUND_EPSILON)
+        mid = bisect.bisect_right(self.starts, timestamp, lo)
+        hi = bisect.bisect_right(self.starts, after, mid)
+
+        direct_segments = []
+        context_segments = []
+        for i in range(lo, mid):
+            end = self.ends[i]
+            # Check if segment directly overlaps with slide timestamp
+            if end >= timestamp:
+                direct_segments.append(self.segments[i])
+            # Segments ending up to 5 seconds before are context, as is one starting exactly at it
+            elif end >= before or self.starts[i] == timestamp:
+                context_segments.append(self.segments[i])
+        # Segments starting within 5 seconds after the timestamp are all context
+        context_segments.extend(self.segments[mid:hi])
+        return direct_segments, context_segments
+
 logger = logging.getLogger("SlideDescriptionGenerator")
 
+# Background thread writing this module's log records; started by the first generator
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+def _start_log_listener():
+    """Configure logging so records are written by a QueueListener thread, not the logging callers
+
+    Returns:
+        The running QueueListener
+    """
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is None:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handlers = [logging.FileHandler("slide_description.log"), logging.StreamHandler()]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+
+            log_queue = queue.Queue(-1)
+            _log_listener = QueueListener(log_queue, *handlers)
+            _log_listener.start()
+            atexit.register(_log_listener.stop)
+
+            logger.addHandler(QueueHandler(log_queue))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return _log_listener
+
 class SlideDescriptionGenerator:
     """Generate concise descriptions for slides using Google's Gemini API"""
 
-    def __init__(self, api_key=None):
-        """Initialize the description generator with the specified API key"""
+    # Upper bound on Gemini requests in flight at once
+    MAX_CONCURRENT_REQUESTS = 16
+    # Slides prepared ahead of the workers
+    PREPARED_QUEUE_SIZE = 32
+    # Retries of a rate-limited request, waiting RATE_LIMIT_BACKOFF * 2**attempt seconds (plus jitter)
+    RATE_LIMIT_RETRIES = 4
+    RATE_LIMIT_BACKOFF = 2.0
+    # Responses are cached by prompt hash, so re-runs over unchanged slides skip the API
+    DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/slide_extractor/slide_descriptions.sqlite")
+
+    def __init__(self, api_key=None, cache_path=None):
+        """Initialize the description generator with the specified API key
+
+        Args:
+            api_key: Gemini API key
+            cache_path: Optional SQLite file for Gemini responses, DEFAULT_CACHE_PATH if omitted
+        """
         self.api_key = api_key
         self.client = None
+        self._log_listener = _start_log_listener()
+        # prompt -> response text, bound to the client's API shape
+        self._generate = None
+
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        cache_path = cache_path or self.DEFAULT_CACHE_PATH
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._cache_db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._cache_db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT)")
+            self._cache_db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Could not open Gemini response cache {cache_path}: {e}")
+            self._cache_db = None
 
     def initialize(self, api_key=None):
         """Initialize the Gemini client with API key"""
@@ -154,11 +370,114 @@ class SlideDescriptionGenerator:
                     self.client = google.generativeai
                     logger.info("Created Gemini client using direct import")
 
+            self._generate = self._resolve_generate(self.client)
             return True
         except Exception as e:
             logger.error(f"Error initializing Gemini client: {e}")
             return False
 
+    @staticmethod
+    def _resolve_generate(client):
+        """Pick the generate call matching the client's API shape
+
+        Args:
+            client: Gemini client created by initialize
+
+        Returns:
+            Function mapping a prompt to the response text
+        """
+        # Every prompt asks for JSON; JSON mode makes Gemini return it bare, without a ```json fence
+        if hasattr(client, 'models') and hasattr(client.models, 'generate_content'):
+            # New Gemini API structure
+            return lambda prompt: client.models.generate_content(
+                model="gemini-2.0-flash",
+                contents=prompt,
+                config=_JSON_RESPONSE_CONFIG
+            ).text
+        if hasattr(client, 'generate_content'):
+            # Old Gemini API structure
+            return lambda prompt: client.generate_content(prompt, generation_config=_JSON_RESPONSE_CONFIG).text
+        # Direct import structure; the model is built once and reused
+        model = client.GenerativeModel('gemini-2.0-flash')
+        return lambda prompt: model.generate_content(prompt, generation_config=_JSON_RESPONSE_CONFIG).text
+
+    @staticmethod
+    def _parse_gemini_json(response_text):
+        """Parse a Gemini reply as JSON, unwrapping a ```json fence if present
+
+        Args:
+            response_text: Text of the Gemini response
+
+        Returns:
+            Parsed JSON, or None if the reply contains no JSON
+        """
+        try:
+            # First try to parse as JSON directly
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            # Look for JSON-like content between triple backticks; a plain find rules out
+            # fence-less replies without running the regex over them
+            fence = response_text.find('```json')
+            if fence == -1:
+                return None
+            json_match = _JSON_FENCE_RE.search(response_text, fence)
+            if json_match:
+                return json.loads(json_match.group(1))
+            return None
+
+    @staticmethod
+    def _cache_key(prompt):
+        """Response cache key for a prompt"""
+        return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _generate_text(self, prompt):
+        """Send a prompt to Gemini and return the response text, using the response cache
+
+        Responses are not cached here; callers store them with _cache_response
+        once they have parsed them, so a malformed reply is retried next run.
+        """
+        key = self._cache_key(prompt)
+        if self._cache_db is not None:
+            with self._cache_lock:
+                try:
+                    row = self._cache_db.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading Gemini response cache: {e}")
+                    row = None
+            if row:
+                return row[0]
+
+        if self._generate is None:
+            self._generate = self._resolve_generate(self.client)
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            try:
+                return self._generate(prompt)
+            except Exception as e:
+                # Concurrent requests can trip per-key rate limits; back off instead of failing the slide
+                if attempt == self.RATE_LIMIT_RETRIES or not _RATE_LIMITED_RE.search(str(e)):
+                    raise
+                wait = self.RATE_LIMIT_BACKOFF * 2 ** attempt + random.uniform(0, 1)
+                logger.warning(f"Gemini rate limited, retrying in {wait:.1f}s: {e}")
+                time.sleep(wait)
+
+    def _cache_response(self, prompt, response_text):
+        """Store a successfully parsed Gemini response in the response cache
+
+        Args:
+            prompt: Prompt the response answers
+            response_text: Text of the Gemini response
+        """
+        if self._cache_db is None or not response_text:
+            return
+        with self._cache_lock:
+            try:
+                self._cache_db.execute(
+                    "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (self._cache_key(prompt), response_text)
+                )
+                self._cache_db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing Gemini response cache: {e}")
+
     def generate_slide_descriptions(self, slides_metadata, transcription_data=None, callback=None):
         """Generate concise descriptions for each slide using Gemini API
 
@@ -177,190 +496,156 @@ class SlideDescriptionGenerator:
         try:
             total_slides = len(slides_metadata)
             processed = 0
-            descriptions = {}
+            results = {}
+            results_lock = threading.Lock()
+
+            # Index the transcription once instead of scanning every segment per slide
+            segment_index = None
+            if transcription_data and 'segments' in transcription_data:
+                segment_index = SegmentIndex(transcription_data['segments'])
+
+            # Each slide is an independent, network-bound Gemini call, so workers run them
+            # concurrently while a producer assembles the next slides' content
+            max_workers = max(1, min(total_slides, self.MAX_CONCURRENT_REQUESTS))
+            prepared = queue.Queue(maxsize=self.PREPARED_QUEUE_SIZE)
+
+            # The same slide is often captured several times; only its first capture goes
+            # to Gemini, the others (filename -> (first filename, timestamp)) reuse its result
+            first_by_content = {}
+            duplicates = {}
+
+            def finish(filename, result):
+                nonlocal processed
+                with results_lock:
+                    results[filename] = result
+
+                    # Update status periodically
+                    processed += 1
+                    if callback and (processed % 5 == 0 or processed == total_slides):
+                        # A failing callback must not stop a worker draining the queue
+                        try:
+                            callback(f"Generating description for slide {processed}/{total_slides}...")
+                        except Exception as e:
+                            logger.error(f"Error in status callback: {e}")
 
-            # Process each slide
-            for filename, metadata in slides_metadata.items():
-                # Update status periodically
-                processed += 1
-                if callback and (processed % 5 == 0 or processed == total_slides):
-                    callback(f"Generating description for slide {processed}/{total_slides}...")
+            def produce():
+                try:
+                    for filename, metadata in slides_metadata.items():
+                        slide = self._prepare_slide(metadata, segment_index)
+                        if slide:
+                            timestamp, combined_content = slide
+                            first = first_by_content.setdefault(combined_content, filename)
+                            if first != filename:
+                                duplicates[filename] = (first, timestamp)
+                                finish(filename, None)
+                                continue
+                        prepared.put((filename, slide))
+                finally:
+                    # One stop marker per worker, even if preparing a slide failed
+                    for _ in range(max_workers):
+                        prepared.put(None)
+
+            def consume():
+                for filename, slide in iter(prepared.get, None):
+                    finish(filename, self._describe_slide(filename, *slide) if slide else None)
+
+            with ThreadPoolExecutor(max_workers=max_workers + 1) as executor:
+                futures = [executor.submit(produce)]
+                futures += [executor.submit(consume) for _ in range(max_workers)]
+                for future in futures:
+                    future.result()
+
+            for filename, (first, timestamp) in duplicates.items():
+                result = copy.deepcopy(results[first])
+                result["timestamp"] = timestamp
+                result["filename"] = filename
+                results[filename] = result
+
+            # Keep the slides' original order
+            return {
+                filename: results[filename]
+                for filename in slides_metadata
+                if results[filename] is not None
+            }
 
-                # Get slide content
-                slide_content = metadata.get('content', '')
-                if not slide_content:
-                    continue
+        except Exception as e:
+            logger.error(f"Error generating slide descriptions: {e}")
+            return None
 
-                # Get slide timestamp and convert to seconds
-                timestamp = convert_timestamp_to_seconds(metadata.get('timestamp', 0))
+    def _prepare_slide(self, metadata, segment_index):
+        """Assemble the content sent to Gemini for a single slide
 
-                # Find relevant transcription for this slide
-                slide_transcription = ""
-                context_transcription = ""
+        Args:
+            metadata: Metadata of the slide
+            segment_index: Optional SegmentIndex of the transcription
 
-                if transcription_data and 'segments' in transcription_data:
+        Returns:
+            Tuple of (timestamp in seconds, combined content), or None if the slide has no content
+        """
+        # Get slide content
+        slide_content = metadata.get('content', '')
+        if not slide_content:
+            return None
 
-                    # Find direct transcription for this slide
-                    direct_segments = []
-                    context_segments = []
+        # Get slide timestamp and convert to seconds
+        timestamp = convert_timestamp_to_seconds(metadata.get('timestamp', 0))
 
-                    for segment in transcription_data['segments']:
-                        # Convert segment timestamps to seconds
-                        start = convert_timestamp_to_seconds(segment.get('start', 0))
-                        end = convert_timestamp_to_seconds(segment.get('end', 0))
+        # Find direct and nearby transcription for this slide, already sorted by start time
+        direct_segments, context_segments = [], []
+        if segment_index is not None:
+            direct_segments, context_segments = segment_index.lookup(timestamp)
 
-                        # Check if segment directly overlaps with slide timestamp
-                        if start <= timestamp and end >= timestamp:
-                            direct_segments.append(segment)
-                        # Also collect nearby segments for context (5 seconds before and after)
-                        elif (timestamp - 5 <= end and end <= timestamp) or (timestamp <= start and start <= timestamp + 5):
-                            context_segments.append(segment)
+        # Combine direct and context segments
+        slide_transcription = " ".join(segment.get('text', '') for segment in direct_segments)
+        context_transcription = " ".join(segment.get('text', '') for segment in context_segments)
 
-                    # Sort segments by start time
-                    direct_segments.sort(key=lambda x: x.get('start', 0))
-                    context_segments.sort(key=lambda x: x.get('start', 0))
+        # Combine slide content and transcription, capped to keep prompts short
+        slide_transcription = _clip(slide_transcription, MAX_TRANSCRIPTION_CHARS)
+        context_transcription = _clip(context_transcription, MAX_CONTEXT_CHARS)
+        combined_content = _clip(slide_content, MAX_SLIDE_CONTENT_CHARS)
 
-                    # Combine direct segments
-                    for segment in direct_segments:
-                        slide_transcription += segment.get('text', '') + " "
+        if slide_transcription:
+            combined_content += f"\n\nTranscription: {slide_transcription}"
 
-                    # Combine context segments
-                    for segment in context_segments:
-                        context_transcription += segment.get('text', '') + " "
+        if context_transcription:
+            combined_content += f"\n\nContext: {context_transcription}"
 
-                # Combine slide content and transcription
-                combined_content = slide_content
+        return timestamp, combined_content
 
-                if slide_transcription:
-                    combined_content += f"\n\nTranscription: {slide_transcription}"
+    def _describe_slide(self, filename, timestamp, combined_content):
+        """Generate the description of a single slide
 
-                if context_transcription:
-                    combined_content += f"\n\nContext: {context_transcription}"
+        Args:
+            filename: Slide filename
+            timestamp: Slide timestamp in seconds
+            combined_content: Slide content and transcription from _prepare_slide
 
-                # Generate description using Gemini
-                try:
-                    prompt = f"""
-                    You are an expert educational content analyzer specializing in extracting meaningful information from lecture slides and transcriptions. Your task is to analyze the following slide content and transcription, then provide a structured analysis.
-
-                    IMPORTANT CONTEXT:
-                    - This is from an educational lecture slide
-                    - The content may include text that was poorly extracted by OCR
-                    - If the content appears to be gibberish or unclear, focus on any recognizable patterns, formulas, or diagrams that might be present
-                    - The transcription (if available) provides spoken context for the slide
-
-                    ANALYSIS INSTRUCTIONS:
-                    1. First, determine if the slide content is readable or mostly gibberish
-                    2. If readable, extract the key information
-                    3. If mostly unreadable, focus on any recognizable patterns, mathematical symbols, or diagrams
-                    4. Use the transcription to provide context for unclear content
-                    5. For mathematical content, pay special attention to equations, variables, and formulas
-
-                    PROVIDE THE FOLLOWING:
-                    1. A concise title (max 10 words) that clearly identifies the main topic
-                    2. A brief description (max 50 words) summarizing the key points
-                    3. Main topic and subtopics (comma-separated list)
-                    4. Key concepts covered (comma-separated list)
-                    5. Important formulas or definitions (if any)
-                    6. Complexity level (Basic, Intermediate, Advanced)
-
-                    Format the response as JSON with these fields:
-                    {{
-                      "title": "Concise title",
-                      "description": "Brief description",
-                      "topics": ["Main topic 1", "Main topic 2"],
-                      "subtopics": ["Subtopic 1", "Subtopic 2"],
-                      "key_concepts": ["Concept 1", "Concept 2"],
-                      "formulas": ["Formula 1", "Formula 2"],
-                      "complexity": "Basic/Intermediate/Advanced"
-                    }}
-
-                    IMPORTANT:
-                    - If the content appears to be mathematical, focus on extracting any equations or formulas
-                    - If the content appears to be code, preserve the syntax and structure
-                    - If the content is mostly unreadable, use the transcription to infer the topic
-                    - Always return valid JSON format
-                    - If you're unsure about the content, make your best educated guess based on context
-
-                    Slide Content:
-                    {combined_content}
-                    """
-
-                    # Handle different client structures
-                    if hasattr(self.client, 'models') and hasattr(self.client.models, 'generate_content'):
-                        # New Gemini API structure
-                        response = self.client.models.generate_content(
-                            model="gemini-2.0-flash",
-                            contents=prompt
-                        )
-                        response_text = response.text
-                    elif hasattr(self.client, 'generate_content'):
-                        # Old Gemini API structure
-                        response = self.client.generate_content(prompt)
-                        response_text = response.text
-                    else:
-                        # Direct import structure
-                        model = self.client.GenerativeModel('gemini-2.0-flash')
-                        response = model.generate_content(prompt)
-                        response_text = response.text
-
-                    # Process the response
-                    try:
-                        # First try to parse as JSON directly
-                        result = json.loads(response_text)
-                    except json.JSONDecodeError:
-                        # If not valid JSON, try to extract JSON from the text
-                        try:
-                            # Look for JSON-like content between triple backticks
-                            import re
-                            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-                            if json_match:
-                                result = json.loads(json_match.group(1))
-                            else:
-                                # Create a simple structure with the raw text
-                                result = {
-                                    "title": "Slide " + filename,
-                                    "description": response_text[:100] + "...",
-                                    "topics": [],
-                                    "subtopics": [],
-                                    "key_concepts": [],
-                                    "complexity": "Intermediate"
-                                }
-                        except Exception as e:
-                            logger.error(f"Error parsing response for slide {filename}: {e}")
-                            result = {
-                                "title": "Slide " + filename,
-                                "description": "Could not generate description",
-                                "topics": [],
-                                "subtopics": [],
-                                "key_concepts": [],
-                                "complexity": "Intermediate"
-                            }
-
-                    # Add timestamp and filename to result
-                    result["timestamp"] = timestamp
-                    result["filename"] = filename
-
-                    # Store the description
-                    descriptions[filename] = result
-
-                except Exception as e:
-                    logger.error(f"Error generating description for slide {filename}: {e}")
-                    descriptions[filename] = {
-                        "title": "Slide " + filename,
-                        "description": "Error generating description",
-                        "topics": [],
-                        "subtopics": [],
-                        "key_concepts": [],
-                        "complexity": "Intermediate",
-                        "timestamp": timestamp,
-                        "filename": filename
-                    }
-
-            return descriptions
+        Returns:
+            Description dictionary
+        """
+        # Generate description using Gemini
+        prompt = _SLIDE_PROMPT_PREFIX + combined_content + _SLIDE_PROMPT_SUFFIX
+        try:
+            response_text = self._generate_text(prompt)
+        except Exception as e:
+            logger.error(f"Error generating description for slide {filename}: {e}")
+            return _fallback_description(filename, timestamp, "Error generating description")
 
+        # Process the response
+        try:
+            result = self._parse_gemini_json(response_text)
+            if result is None:
+                # Create a simple structure with the raw text
+                return _fallback_description(filename, timestamp, response_text[:100] + "...")
+
+            # Add timestamp and filename to result
+            result["timestamp"] = timestamp
+            result["filename"] = filename
+            self._cache_response(prompt, response_text)
+            return result
         except Exception as e:
-            logger.error(f"Error generating slide descriptions: {e}")
-            return None
+            logger.error(f"Error parsing response for slide {filename}: {e}")
+            return _fallback_description(filename, timestamp, "Could not generate description")
 
     def create_topic_index(self, descriptions):
         """Create a searchable index of topics from slide descriptions
@@ -371,30 +656,14 @@ class SlideDescriptionGenerator:
         Returns:
             Dictionary mapping topics to slides
         """
-        topic_index = {}
+        topic_index = defaultdict(list)
 
         for filename, desc in descriptions.items():
-            # Process main topics
-            topics = desc.get('topics', [])
-            if isinstance(topics, str):
-                topics = [t.strip() for t in topics.split(',')]
-
-            for topic in topics:
-                if topic not in topic_index:
-                    topic_index[topic] = []
+            # Main topics and subtopics are indexed the same way
+            for topic in chain(_as_list(desc.get('topics')), _as_list(desc.get('subtopics'))):
                 topic_index[topic].append(filename)
 
-            # Process subtopics
-            subtopics = desc.get('subtopics', [])
-            if isinstance(subtopics, str):
-                subtopics = [t.strip() for t in subtopics.split(',')]
-
-            for subtopic in subtopics:
-                if subtopic not in topic_index:
-                    topic_index[subtopic] = []
-                topic_index[subtopic].append(filename)
-
-        return topic_index
+        return dict(topic_index)
 
     def generate_content_summary(self, descriptions, transcription_data=None):
         """Generate a summary of the entire content
@@ -416,15 +685,8 @@ class SlideDescriptionGenerator:
             all_subtopics = set()
 
             for desc in descriptions.values():
-                topics = desc.get('topics', [])
-                if isinstance(topics, str):
-                    topics = [t.strip() for t in topics.split(',')]
-                all_topics.update(topics)
-
-                subtopics = desc.get('subtopics', [])
-                if isinstance(subtopics, str):
-                    subtopics = [t.strip() for t in subtopics.split(',')]
-                all_subtopics.update(subtopics)
+                all_topics.update(_as_list(desc.get('topics')))
+                all_subtopics.update(_as_list(desc.get('subtopics')))
 
             # Get full transcription text if available
             full_transcript = ""
@@ -435,11 +697,11 @@ class SlideDescriptionGenerator:
             prompt = f"""
             Based on the following information, generate a comprehensive summary of the educational content:
 
-            Main Topics: {', '.join(all_topics)}
-            Subtopics: {', '.join(all_subtopics)}
+            Main Topics: {', '.join(sorted(all_topics))}
+            Subtopics: {', '.join(sorted(all_subtopics))}
 
             Full Transcript:
-            {full_transcript[:2000]}... [truncated]
+            {_clip(full_transcript, MAX_SUMMARY_TRANSCRIPT_CHARS)}
 
             Provide:
             1. A title for the overall content
@@ -451,54 +713,19 @@ class SlideDescriptionGenerator:
             Format the response as JSON with these fields: title, summary, learning_objectives, prerequisites, difficulty
             """
 
-            # Handle different client structures
-            if hasattr(self.client, 'models') and hasattr(self.client.models, 'generate_content'):
-                # New Gemini API structure
-                response = self.client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=prompt
-                )
-                response_text = response.text
-            elif hasattr(self.client, 'generate_content'):
-                # Old Gemini API structure
-                response = self.client.generate_content(prompt)
-                response_text = response.text
-            else:
-                # Direct import structure
-                model = self.client.GenerativeModel('gemini-2.0-flash')
-                response = model.generate_content(prompt)
-                response_text = response.text
+            response_text = self._generate_text(prompt)
 
             # Process the response
             try:
-                # First try to parse as JSON directly
-                result = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If not valid JSON, try to extract JSON from the text
-                try:
-                    # Look for JSON-like content between triple backticks
-                    import re
-                    json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-                    if json_match:
-                        result = json.loads(json_match.group(1))
-                    else:
-                        # Create a simple structure with the raw text
-                        result = {
-                            "title": "Content Summary",
-                            "summary": response_text[:500] + "...",
-                            "learning_objectives": [],
-                            "prerequisites": [],
-                            "difficulty": "Intermediate"
-                        }
-                except Exception as e:
-                    logger.error(f"Error parsing content summary response: {e}")
-                    result = {
-                        "title": "Content Summary",
-                        "summary": "Could not generate summary",
-                        "learning_objectives": [],
-                        "prerequisites": [],
-                        "difficulty": "Intermediate"
-                    }
+                result = self._parse_gemini_json(response_text)
+                if result is None:
+                    # Create a simple structure with the raw text
+                    result = _fallback_summary(response_text[:500] + "...")
+                else:
+                    self._cache_response(prompt, response_text)
+            except Exception as e:
+                logger.error(f"Error parsing content summary response: {e}")
+                result = _fallback_summary("Could not generate summary")
 
             return result
 
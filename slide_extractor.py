@@ -55,6 +55,7 @@ YOLO_MODEL_WEIGHTS_URL = "https://raw.githubusercontent.com/opencv/opencv_3rdpar
 YOLO_MODEL_PATH = "deploy.prototxt"
 YOLO_MODEL_WEIGHTS_PATH = "res10_300x300_ssd_iter_140000_fp16.caffemodel"
 YOLO_CONFIDENCE_THRESHOLD = 0.5
+YOLO_BATCH_SIZE = 16  # Frames per face-detector forward pass
 YOLO_PERSON_CLASS_ID = 1  # For face detection, we'll use any detection as a "person"
 
 def download_yolo_model():
@@ -260,6 +261,14 @@ class SlideExtractor:
             self.human_detector = HumanDetector()
             return False
 
+    def _fallback_detect_humans(self, frame):
+        """Detect humans with HumanDetector, returning (x1, y1, x2, y2) boxes."""
+        if hasattr(self, 'human_detector'):
+            boxes = self.human_detector.detect_humans(frame)
+            # Convert from (x, y, w, h) to (x1, y1, x2, y2) format
+            return [(box[0], box[1], box[0] + box[2], box[1] + box[3]) for box in boxes]
+        return []
+
     def _detect_humans(self, frame):
         """
         Detect faces in a frame using SSD face detector or fallback to HumanDetector.
@@ -271,46 +280,51 @@ class SlideExtractor:
         Returns:
             List of bounding boxes for detected faces: [(x1, y1, x2, y2), ...]
         """
-        # If model is not available, use the fallback HumanDetector
-        if self.yolo_model is None:
-            if hasattr(self, 'human_detector'):
-                # Use the fallback human detector
-                boxes = self.human_detector.detect_humans(frame)
-                # Convert from (x, y, w, h) to (x1, y1, x2, y2) format
-                return [(box[0], box[1], box[0] + box[2], box[1] + box[3]) for box in boxes]
-            return []
-
-        try:
-            # Get frame dimensions
-            height, width = frame.shape[:2]
-
-            # Create a blob from the frame - Face detector uses 300x300 input size
-            # Mean values for the face detector are (104.0, 177.0, 123.0)
-            blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0), swapRB=False, crop=False)
-
-            # Set the input to the model
-            self.yolo_model.setInput(blob)
+        return self._detect_humans_batch([frame])[0]
 
-            # Forward pass through the network
-            detections = self.yolo_model.forward()
+    def _detect_humans_batch(self, frames):
+        """
+        Detect faces in several frames with a single forward pass per batch.
 
-            # Process the outputs
-            face_boxes = []
+        Frames are packed into one blob with cv2.dnn.blobFromImages (at most
+        YOLO_BATCH_SIZE per pass) and each detection is routed back to its
+        frame through the image_id column of the output.
 
-            # Face detector output format:
-            # detections shape is [1, 1, N, 7] where:
-            # - N is the number of detections
-            # - 7 = [image_id, label, confidence, x_min, y_min, x_max, y_max]
+        Args:
+            frames: List of frames to analyze
 
-            # Extract detections with confidence > threshold
-            for i in range(detections.shape[2]):
-                # Extract confidence
-                confidence = detections[0, 0, i, 2]
+        Returns:
+            List with one list of (x1, y1, x2, y2) boxes per input frame
+        """
+        # If model is not available, use the fallback HumanDetector
+        if self.yolo_model is None:
+            return [self._fallback_detect_humans(frame) for frame in frames]
 
-                # For face detector, we don't need to check class ID as it only detects faces
-                if confidence > YOLO_CONFIDENCE_THRESHOLD:
-                    # Face detector returns normalized coordinates [x_min, y_min, x_max, y_max]
-                    # Extract and denormalize the coordinates
+        results = []
+        for start in range(0, len(frames), YOLO_BATCH_SIZE):
+            batch = frames[start:start + YOLO_BATCH_SIZE]
+            try:
+                # Face detector uses 300x300 input size and mean values (104.0, 177.0, 123.0)
+                blob = cv2.dnn.blobFromImages(batch, 1.0, (300, 300), (104.0, 177.0, 123.0), swapRB=False, crop=False)
+                self.yolo_model.setInput(blob)
+                detections = self.yolo_model.forward()
+
+                # detections shape is [1, 1, N, 7] where:
+                # - N is the number of detections across the whole batch
+                # - 7 = [image_id, label, confidence, x_min, y_min, x_max, y_max]
+                batch_boxes = [[] for _ in batch]
+                sizes = [frame.shape[:2] for frame in batch]
+                for i in range(detections.shape[2]):
+                    confidence = detections[0, 0, i, 2]
+                    if confidence <= YOLO_CONFIDENCE_THRESHOLD:
+                        continue
+
+                    image_id = int(detections[0, 0, i, 0])
+                    if not 0 <= image_id < len(batch):
+                        continue
+                    height, width = sizes[image_id]
+
+                    # Denormalize the coordinates for the frame this detection belongs to
                     x1 = int(detections[0, 0, i, 3] * width)
                     y1 = int(detections[0, 0, i, 4] * height)
                     x2 = int(detections[0, 0, i, 5] * width)
@@ -320,26 +334,21 @@ class SlideExtractor:
                     padding_x = int((x2 - x1) * 1.0)  # 100% wider
                     padding_y = int((y2 - y1) * 2.0)  # 200% taller (to capture body)
 
-                    x1 = max(0, x1 - padding_x)
-                    y1 = max(0, y1 - padding_y // 2)
-                    x2 = min(width, x2 + padding_x)
-                    y2 = min(height, y2 + padding_y)
+                    batch_boxes[image_id].append((
+                        max(0, x1 - padding_x),
+                        max(0, y1 - padding_y // 2),
+                        min(width, x2 + padding_x),
+                        min(height, y2 + padding_y)
+                    ))
 
-                    # Add the bounding box to the list
-                    face_boxes.append((x1, y1, x2, y2))
+                results.extend(batch_boxes)
 
-            return face_boxes
+            except Exception as e:
+                logger.error(f"Error detecting faces: {e}")
+                logger.info("Falling back to HumanDetector for this batch")
+                results.extend(self._fallback_detect_humans(frame) for frame in batch)
 
-        except Exception as e:
-            logger.error(f"Error detecting faces: {e}")
-            logger.info("Falling back to HumanDetector for this frame")
-
-            # Fallback to HumanDetector
-            if hasattr(self, 'human_detector'):
-                boxes = self.human_detector.detect_humans(frame)
-                # Convert from (x, y, w, h) to (x1, y1, x2, y2) format
-                return [(box[0], box[1], box[0] + box[2], box[1] + box[3]) for box in boxes]
-            return []
+        return results
 
     def _create_human_mask(self, frame, human_boxes):
         """
@@ -1398,8 +1407,7 @@ class SlideExtractor:
             # Process frames to ignore human regions if enabled
             if self.ignore_human_movement and self.yolo_model is not None:
                 # Detect humans in both frames
-                human_boxes1 = self._detect_humans(frame1)
-                human_boxes2 = self._detect_humans(frame2)
+                human_boxes1, human_boxes2 = self._detect_humans_batch([frame1, frame2])
 
                 # Even more improved approach: Focus on a very central region of the slide
                 # and completely ignore human detection in this comparison
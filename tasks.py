@@ -271,7 +271,8 @@ def update_task_progress(job_id: str, progress: Optional[float], message: str):
             meta={'progress': progress, 'message': message}
         )
     
-    job_storage.update_job_status(job_id, 'processing', progress, message)
+    # Progress callbacks fire often; let the storage service batch the writes
+    job_storage.queue_progress_update(job_id, 'processing', progress, message)
 
 def store_slides_in_db(job_id: str, slides: list):
     """Store extracted slides in database."""
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test that SegmentIndex finds the same transcript segments as a linear scan
+"""
+
+import random
+
+from slide_description_generator import SegmentIndex, convert_timestamp_to_seconds
+
+def linear_lookup(segments, timestamp):
+    """Reference implementation: scan every segment"""
+    direct, context = [], []
+    for segment in segments:
+        start = convert_timestamp_to_seconds(segment['start'])
+        end = convert_timestamp_to_seconds(segment['end'])
+        if start <= timestamp <= end:
+            direct.append(segment)
+        elif timestamp - 5 <= end <= timestamp or timestamp <= start <= timestamp + 5:
+            context.append(segment)
+    return direct, context
+
+def same_segments(a, b):
+    return sorted(map(id, a)) == sorted(map(id, b))
+
+def test_context_boundary():
+    """A segment ending exactly CONTEXT_WINDOW seconds before the timestamp is context"""
+    segments = [
+        {'start': 1.7, 'end': 35.7, 'text': 'long'},
+        {'start': 39.0, 'end': 41.0, 'text': 'direct'},
+    ]
+    direct, context = SegmentIndex(segments).lookup(40.7)
+    assert [s['text'] for s in direct] == ['direct']
+    assert [s['text'] for s in context] == ['long']
+
+def test_matches_linear_scan():
+    """Randomized segments give the same direct and context segments as the scan"""
+    rng = random.Random(0)
+    for _ in range(300):
+        segments = []
+        for i in range(rng.randint(0, 60)):
+            start = round(rng.uniform(0, 200), 1)
+            end = round(start + rng.choice([rng.uniform(0, 10), rng.uniform(0, 60)]), 1)
+            segments.append({'start': start if rng.random() < 0.5 else str(start), 'end': end, 'text': str(i)})
+        index = SegmentIndex(segments)
+        # Timestamps on the segment boundaries are the ones rounding can get wrong
+        timestamps = [rng.uniform(-10, 220) for _ in range(10)]
+        timestamps += [convert_timestamp_to_seconds(s['end']) + 5 for s in segments[:10]]
+        for timestamp in timestamps:
+            direct, context = index.lookup(timestamp)
+            expected_direct, expected_context = linear_lookup(segments, timestamp)
+            assert same_segments(direct, expected_direct), timestamp
+            assert same_segments(context, expected_context), timestamp
+
+def main():
+    test_context_boundary()
+    test_matches_linear_scan()
+    print("✅ SegmentIndex matches the linear scan")
+
+if __name__ == "__main__":
+    main()